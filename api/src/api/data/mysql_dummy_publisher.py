@@ -5,15 +5,26 @@ Continuous MySQL dummy data publisher for sensordb.sensor_data
 - Graceful shutdown and resource cleanup
 - Optional batching (executemany) for higher throughput
 - Exponential backoff on transient failures
+- MODE='mapped': realistic values for every mapped sensor in sensor_uuids.txt, written in a
+  wide (one column per UUID) or long (uuid, ts, value) layout, to load-test
+  fetchLatestForAllMappings and the SSE external-latest broadcast at building scale
+- PROFILE: per-phase timers (generate / execute / commit), optionally under cProfile and
+  tracemalloc, reported on shutdown (PROFILE=all python mysql_dummy_publisher.py)
 Requires: pip install PyMySQL
 """
 from __future__ import annotations
+import cProfile
+import json
+import math
 import os
 import random
 import re
 import sys
 import time
 import signal
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
 try:
@@ -51,6 +62,22 @@ SETTINGS = {
     'BACKOFF_INITIAL_S': 1.0,   # initial backoff
     'BACKOFF_FACTOR': 2.0,      # multiplier per failure
     'BACKOFF_MAX_S': 30.0,      # cap
+
+    # Mode: 'columns' = random values for every column of TABLE (default)
+    #       'mapped'  = realistic values for every mapped sensor UUID (one snapshot per tick)
+    'MODE': 'columns',
+
+    # Mapped mode
+    'LAYOUT': 'wide',           # 'wide': TIMESTAMP_COLUMN + one column per UUID (pivot mappings, device_id_column=COLUMN)
+                                # 'long': (sensor_uuid, sensor_name, value, unit, TIMESTAMP_COLUMN) rows; usually TIMESTAMP_COLUMN='ts'
+    'SENSOR_UUIDS_FILE': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sensor_uuids.txt'),
+    'MAPPINGS_DB': 'abacws',    # DB holding device_timeseries_mappings; '' = publish every UUID in the file
+    'MAPPINGS_REFRESH_S': 300,  # re-read mappings this often
+    'ENSURE_SCHEMA': True,      # create TABLE / missing UUID columns when needed
+
+    # Profiling (env PROFILE overrides): '' = off, comma list of 'phases', 'cprofile', 'tracemalloc' or 'all'
+    'PROFILE': '',
+    'PROFILE_DIR': '.',         # where <pid>.pstats / .alloc.txt are written on shutdown
 }
 # ===========================================================================
 
@@ -70,6 +97,65 @@ def register_signal_handlers():
     signal.signal(signal.SIGINT, _signal_handler)
     signal.signal(signal.SIGTERM, _signal_handler)
 
+class Profiler:
+    """Per-phase timers plus optional cProfile / tracemalloc; phase() is a no-op when off."""
+
+    def __init__(self, spec: str, out_dir: str):
+        parts = {p.strip().lower() for p in spec.split(',') if p.strip()}
+        full = 'all' in parts
+        self.phases_on = full or bool(parts & {'1', 'true', 'phases'})
+        self.cprofile = cProfile.Profile() if (full or 'cprofile' in parts) else None
+        self.trace = full or 'tracemalloc' in parts
+        self.out_dir = out_dir
+        self.phases: Dict[str, List[float]] = {}  # name -> [count, total_s, max_s]
+        self.started = time.perf_counter()
+        if self.trace:
+            tracemalloc.start(10)
+        if self.cprofile:
+            self.cprofile.enable()
+
+    def phase(self, name: str):
+        return self._timed(name) if self.phases_on else nullcontext()
+
+    @contextmanager
+    def _timed(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            st = self.phases.setdefault(name, [0, 0.0, 0.0])
+            st[0] += 1
+            st[1] += dt
+            st[2] = max(st[2], dt)
+
+    def report(self):
+        wall = time.perf_counter() - self.started
+        if self.cprofile:
+            self.cprofile.disable()
+        for name, (n, total, mx) in sorted(self.phases.items(), key=lambda kv: -kv[1][1]):
+            print(f"[py-dummy] Phase {name:<8} n={n} total={total:.2f}s ({total / wall * 100.0:.1f}% of {wall:.1f}s) "
+                  f"mean={total / n * 1000.0:.2f}ms max={mx * 1000.0:.2f}ms", flush=True)
+        if not (self.cprofile or self.trace):
+            return
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, f"mysql_dummy_publisher-{os.getpid()}")
+        if self.cprofile:
+            self.cprofile.dump_stats(base + '.pstats')
+            print(f"[py-dummy] cProfile stats written to {base}.pstats", flush=True)
+        if self.trace:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(base + '.alloc.txt', 'w', encoding='utf-8') as f:
+                f.write(f"peak traced={peak / 1024:.1f} KiB\n")
+                for stat in snapshot.statistics('lineno')[:25]:
+                    f.write(f"{stat}\n")
+            print(f"[py-dummy] Top allocations written to {base}.alloc.txt (peak {peak / 1024:.1f} KiB)", flush=True)
+
+# Replaced in main() when profiling is enabled
+_PROF = Profiler('', '.')
+
 def pick(seq):
     return random.choice(seq)
 
@@ -189,10 +275,12 @@ def build_insert_sql(cfg, ts_col: str, cols: List[Dict[str, object]]):
     return sql
 
 def make_row_values(cols: List[Dict[str, object]]):
-    return [gen_value(c) for c in cols]
+    with _PROF.phase('generate'):
+        return [gen_value(c) for c in cols]
 
 def insert_single(conn, sql: str, vals: List[object], verbose=False):
-    with conn.cursor() as cur:
+    # autocommit is on, so 'execute' includes the commit here
+    with _PROF.phase('execute'), conn.cursor() as cur:
         cur.execute(sql, vals)
     if verbose:
         print("[py-dummy] Inserted 1 row", flush=True)
@@ -202,14 +290,211 @@ def insert_batch(conn, sql: str, rows: List[List[object]], verbose=False):
     prev_autocommit = conn.get_autocommit()
     try:
         conn.autocommit(False)
-        with conn.cursor() as cur:
+        with _PROF.phase('execute'), conn.cursor() as cur:
             cur.executemany(sql, rows)
-        conn.commit()
+        with _PROF.phase('commit'):
+            conn.commit()
     finally:
         conn.autocommit(prev_autocommit)
     if verbose:
         print(f"[py-dummy] Inserted batch of {len(rows)} rows", flush=True)
 
+# ----------------------------- Mapped mode ---------------------------------
+
+# Family (sensor name without the trailing _5.xx) -> (units, typical low, typical high, follows occupancy)
+FAMILY_PROFILES = {
+    'Air_Quality_Level_Sensor': ('AQI', 10.0, 80.0, True),
+    'Air_Quality_Sensor': ('ppm', 50.0, 300.0, True),
+    'Air_Temperature_Sensor': ('°C', 19.0, 25.0, True),
+    'Alcohol_Vapor_MQ3_Gas_Sensor': ('ppm', 0.1, 8.0, False),
+    'CO2_Level_Sensor': ('ppm', 420.0, 1200.0, True),
+    'CO_Level_Sensor': ('ppm', 0.1, 4.0, False),
+    'Carbon_Monoxide_Coal_Gas_Liquefied_MQ9_Gas_Sensor': ('ppm', 0.5, 15.0, False),
+    'Combustible_Gas_Smoke_MQ2_Sensor': ('ppm', 1.0, 40.0, False),
+    'Ethyl_Alcohol_C2H5CH_Gas_Sensor': ('ppm', 0.1, 8.0, False),
+    'Formaldehyde_Level_Sensor': ('mg/m³', 0.005, 0.08, True),
+    'Illuminance_Sensor': ('Lux', 5.0, 600.0, True),
+    'LPG_Natural_Gas_Town_MQ5_Gas_Sensor': ('ppm', 1.0, 25.0, False),
+    'NO2_Level_Sensor': ('ppb', 5.0, 60.0, False),
+    'Oxygen_O2_Percentage_Gas_Sensor': ('%', 20.6, 20.95, False),
+    'PM10_Level_Sensor_Atmospheric': ('µg/m³', 5.0, 40.0, True),
+    'PM1_Level_Sensor_Atmospheric': ('µg/m³', 1.0, 15.0, True),
+    'PM2.5_Level_Sensor_Atmospheric': ('µg/m³', 2.0, 25.0, True),
+    'Sound_Noise_Sensor_MEMS': ('dB', 30.0, 72.0, True),
+    'TVOC_Level_Sensor': ('ppb', 50.0, 500.0, True),
+    'Zone_Air_Humidity_Sensor': ('%', 30.0, 60.0, False),
+}
+DEFAULT_PROFILE = ('', 0.0, 100.0, False)
+
+def occupancy(now: datetime) -> float:
+    """0..1 office occupancy: weekday daytime bell peaking early afternoon.
+
+    Deliberate standalone copy of simulate_history.occupancy: this script runs on its own from
+    api/src/api/data and does not import the root-level tools. Keep the two curves in step.
+    """
+    if now.weekday() >= 5:
+        return 0.05
+    hour = now.hour + now.minute / 60.0
+    if hour < 7 or hour > 20:
+        return 0.0
+    return max(0.0, math.sin(math.pi * (hour - 7) / 13.0))
+
+class SensorModel:
+    """Occupancy-driven baseline plus a mean-reverting random walk, clamped to the family range."""
+
+    def __init__(self, name: str):
+        family = re.sub(r'_\d+\.\d+$', '', name)
+        self.unit, self.low, self.high, self.occupancy_driven = FAMILY_PROFILES.get(family, DEFAULT_PROFILE)
+        self.offset = 0.0
+
+    def next(self, now: datetime) -> float:
+        span = self.high - self.low
+        level = 0.2 + 0.7 * occupancy(now) if self.occupancy_driven else 0.4
+        self.offset = 0.9 * self.offset + random.gauss(0.0, 0.03 * span)
+        v = self.low + span * level + self.offset
+        return round(min(self.high * 1.2, max(self.low * 0.8, v)), 3)
+
+def read_sensor_uuids(path: str) -> List[Tuple[str, str]]:
+    out = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = [p.strip() for p in line.split(',')]
+            if len(parts) >= 2 and parts[0] and parts[1]:
+                out.append((parts[0], parts[1]))
+    return out
+
+def load_mapped_uuids(conn, mappings_db: str) -> Optional[set]:
+    """UUIDs referenced by device_timeseries_mappings (pivot value column or long identifier)."""
+    if not mappings_db:
+        return None
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT device_id_column, device_identifier_value, value_columns FROM `{mappings_db}`.`device_timeseries_mappings`"
+        )
+        rows = cur.fetchall()
+    uuids = set()
+    for r in rows:
+        if str(r['device_id_column']).upper() == 'COLUMN':
+            cols = r['value_columns']
+            cols = json.loads(cols) if isinstance(cols, (str, bytes)) else (cols or [])
+            uuids.update(str(c) for c in cols)
+        else:
+            uuids.add(str(r['device_identifier_value']))
+    return uuids
+
+def select_mapped_sensors(conn, cfg, verbose=False) -> List[Tuple[str, str]]:
+    sensors = read_sensor_uuids(cfg['sensor_file'])
+    try:
+        mapped = load_mapped_uuids(conn, cfg['mappings_db'])
+    except Exception as e:
+        print(f"[py-dummy] Could not read mappings ({e}); publishing every UUID in {cfg['sensor_file']}", file=sys.stderr, flush=True)
+        mapped = None
+    if mapped:
+        sensors = [s for s in sensors if s[1] in mapped]
+    elif verbose:
+        print(f"[py-dummy] No mappings found; publishing every UUID in {cfg['sensor_file']}", flush=True)
+    return sensors
+
+def ensure_wide_schema(conn, cfg, ts_col: str, uuids: List[str]) -> List[str]:
+    """Create the wide table / missing UUID columns if allowed; return the UUID columns present."""
+    db, table = cfg['db'], cfg['table']
+    with conn.cursor() as cur:
+        if cfg['ensure_schema']:
+            cur.execute(
+                f"CREATE TABLE IF NOT EXISTS `{db}`.`{table}` (`{ts_col}` DATETIME NOT NULL, INDEX idx_ts (`{ts_col}`)) ENGINE=InnoDB"
+            )
+        cur.execute(
+            "SELECT column_name AS cname FROM information_schema.columns WHERE table_schema=%s AND table_name=%s",
+            (db, table)
+        )
+        existing = {r['cname'] for r in cur.fetchall()}
+        missing = [u for u in uuids if u not in existing]
+        if missing and cfg['ensure_schema']:
+            cur.execute(f"ALTER TABLE `{db}`.`{table}` " + ", ".join(f"ADD COLUMN `{u}` DOUBLE NULL" for u in missing))
+            existing.update(missing)
+    return [u for u in uuids if u in existing]
+
+def ensure_long_schema(conn, cfg, ts_col: str) -> None:
+    if not cfg['ensure_schema']:
+        return
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS `{cfg['db']}`.`{cfg['table']}` (
+              id BIGINT AUTO_INCREMENT PRIMARY KEY,
+              sensor_name VARCHAR(255),
+              sensor_uuid VARCHAR(36),
+              value FLOAT,
+              unit VARCHAR(20),
+              `{ts_col}` TIMESTAMP,
+              INDEX idx_sensor_ts (sensor_name, `{ts_col}`),
+              INDEX idx_uuid_ts (sensor_uuid, `{ts_col}`)
+            ) ENGINE=InnoDB
+            """
+        )
+
+class MappedPublisher:
+    """Writes one snapshot per tick for every mapped sensor, in the wide or long layout."""
+
+    def __init__(self, conn, cfg, verbose=False):
+        self.cfg = cfg
+        self.verbose = verbose
+        self.layout = cfg['layout']
+        self.ts_col = cfg['ts_col_override'] or ('Datetime' if self.layout == 'wide' else 'ts')
+        self.models: Dict[str, SensorModel] = {}
+        self.sensors: List[Tuple[str, str]] = []
+        self.loaded_at = 0.0
+        self.refresh(conn)
+
+    def refresh(self, conn) -> None:
+        sensors = select_mapped_sensors(conn, self.cfg, self.verbose)
+        db, table = self.cfg['db'], self.cfg['table']
+        if self.layout == 'wide':
+            present = set(ensure_wide_schema(conn, self.cfg, self.ts_col, [u for _, u in sensors]))
+            sensors = [s for s in sensors if s[1] in present]
+            self.sql = (
+                f"INSERT INTO `{db}`.`{table}` (`{self.ts_col}`, "
+                + ", ".join(f"`{u}`" for _, u in sensors)
+                + ") VALUES (NOW(), " + ", ".join('%s' for _ in sensors) + ")"
+            )
+        else:
+            ensure_long_schema(conn, self.cfg, self.ts_col)
+            self.sql = (
+                f"INSERT INTO `{db}`.`{table}` (sensor_uuid, sensor_name, value, unit, `{self.ts_col}`) "
+                "VALUES (%s, %s, %s, %s, NOW())"
+            )
+        for name, uuid in sensors:
+            if uuid not in self.models:
+                self.models[uuid] = SensorModel(name)
+        self.sensors = sensors
+        self.loaded_at = time.time()
+        if self.verbose:
+            print(f"[py-dummy] Mapped mode: {len(sensors)} sensors, layout={self.layout}, target={db}.{table}, ts={self.ts_col}", flush=True)
+
+    def tick(self, conn) -> int:
+        if time.time() - self.loaded_at >= float(self.cfg['mappings_refresh_s']):
+            self.refresh(conn)
+        if not self.sensors:
+            return 0
+        now = datetime.now()
+        if self.layout == 'wide':
+            with _PROF.phase('generate'):
+                vals = [self.models[u].next(now) for _, u in self.sensors]
+            insert_single(conn, self.sql, vals, verbose=False)
+            rows = 1
+        else:
+            with _PROF.phase('generate'):
+                rows_data = [[u, n, self.models[u].next(now), self.models[u].unit] for n, u in self.sensors]
+            insert_batch(conn, self.sql, rows_data, verbose=False)
+            rows = len(rows_data)
+        if self.verbose:
+            print(f"[py-dummy] Published {len(self.sensors)} sensors ({rows} rows, {self.layout})", flush=True)
+        return rows
+
+
 def main() -> int:
     cfg = {
         'host': SETTINGS['HOST'],
@@ -219,7 +504,13 @@ def main() -> int:
         'db': SETTINGS['DB'],
         'table': SETTINGS['TABLE'],
         'ts_col_override': SETTINGS.get('TIMESTAMP_COLUMN') or '',
+        'layout': str(SETTINGS.get('LAYOUT', 'wide')).lower(),
+        'sensor_file': SETTINGS.get('SENSOR_UUIDS_FILE'),
+        'mappings_db': SETTINGS.get('MAPPINGS_DB') or '',
+        'mappings_refresh_s': SETTINGS.get('MAPPINGS_REFRESH_S', 300),
+        'ensure_schema': bool(SETTINGS.get('ENSURE_SCHEMA', True)),
     }
+    mode = str(SETTINGS.get('MODE', 'columns')).lower()
     interval = max(0, int(SETTINGS.get('INTERVAL_SECONDS', 10)))
     verbose = bool(SETTINGS.get('VERBOSE', False))
     batch_size = max(1, int(SETTINGS.get('BATCH_SIZE', 1)))
@@ -230,17 +521,27 @@ def main() -> int:
 
     register_signal_handlers()
 
+    global _PROF
+    profile = os.getenv('PROFILE', SETTINGS.get('PROFILE') or '')
+    if profile:
+        _PROF = Profiler(profile, os.getenv('PROFILE_DIR', SETTINGS.get('PROFILE_DIR') or '.'))
+        print(f"[py-dummy] Profiling enabled: {profile}", flush=True)
+
     if verbose:
         print(f"[py-dummy] Connecting to MySQL {cfg['host']}:{cfg['port']} db={cfg['db']}", flush=True)
 
     conn = connect_mysql(cfg)
 
     try:
-        ts_col, cols = load_columns(conn, cfg)
-        cols = [c for c in cols if c and c.get('cname') is not None]
-        sql = build_insert_sql(cfg, ts_col, cols)
-
-        if verbose:
+        if mode == 'mapped':
+            mapped = MappedPublisher(conn, cfg, verbose=verbose)
+        else:
+            mapped = None
+            ts_col, cols = load_columns(conn, cfg)
+            cols = [c for c in cols if c and c.get('cname') is not None]
+            sql = build_insert_sql(cfg, ts_col, cols)
+
+        if verbose and not mapped:
             mode = "batch" if batch_size > 1 else "single"
             limit = "infinite" if max_rows == 0 else str(max_rows)
             print(f"[py-dummy] Target: {cfg['db']}.{cfg['table']}, ts: {ts_col}, value cols: {len(cols)}", flush=True)
@@ -252,7 +553,9 @@ def main() -> int:
                 break
 
             try:
-                if batch_size == 1:
+                if mapped:
+                    total += mapped.tick(conn)
+                elif batch_size == 1:
                     vals = make_row_values(cols)
                     insert_single(conn, sql, vals, verbose=verbose)
                     total += 1
@@ -298,6 +601,8 @@ def main() -> int:
             print(f"[py-dummy] Stopping. Inserted total {total} rows.", flush=True)
         return 0
     finally:
+        if profile:
+            _PROF.report()
         try:
             conn.close()
         except Exception:
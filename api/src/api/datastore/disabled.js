@@ -42,7 +42,14 @@ async function latestDeviceData(name) {
 }
 async function insertDeviceData(name, data) {
   if (!history[name]) history[name] = [];
-  history[name].push(data);
+  // Keep each device's readings in timestamp order: client timestamps may arrive out of order
+  const arr = history[name];
+  let lo = 0; let hi = arr.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (arr[mid].timestamp <= data.timestamp) lo = mid + 1; else hi = mid;
+  }
+  if (lo === arr.length) arr.push(data); else arr.splice(lo, 0, data);
 }
 async function deviceHistory(name, from, to, limit = 10000) {
   const arr = history[name] || [];
@@ -1,5 +1,5 @@
 const { DB_ENGINE } = require('../constants');
-const base = { ...require('./errors'), ...require('./auth') };
+const base = { ...require('./errors'), ...require('./auth'), ...require('./telemetry') };
 
 if (DB_ENGINE === 'postgres') {
   // We still need real device resolution for Postgres engine (uses unified datastore).
@@ -0,0 +1,106 @@
+const express = require('express');
+const store = require('../datastore');
+
+// Device data bodies may be JSON (parsed by express.json) or MessagePack, optionally
+// gzip/deflate encoded; body-parser inflates either. MessagePack support needs the optional
+// @msgpack/msgpack package and is reported as 415 when it is not installed. It is not in
+// package-lock.json yet, so the image build's `npm ci` falls back to `npm i`, which installs it.
+const MSGPACK_TYPES = ['application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack'];
+const rawMsgpack = express.raw({ type: MSGPACK_TYPES, limit: '1mb' });
+
+let msgpack;
+function loadMsgpack() {
+  if (msgpack === undefined) {
+    try { msgpack = require('@msgpack/msgpack'); } catch (_) { msgpack = null; }
+  }
+  return msgpack;
+}
+
+function decodeTelemetry(req, res, next) {
+  if (!Buffer.isBuffer(req.body)) return next();
+  const codec = loadMsgpack();
+  if (!codec) return res.status(415).json({ error: 'application/msgpack is not supported by this deployment' });
+  try {
+    req.body = codec.decode(req.body);
+  } catch (e) {
+    return res.status(400).json({ error: `Invalid MessagePack body: ${e.message}` });
+  }
+  if (!req.body || typeof req.body !== 'object' || Array.isArray(req.body)) {
+    return res.status(400).json({ error: 'Invalid payload' });
+  }
+  next();
+}
+
+// Compact "units once" schema: { values: { channel: number }, units?: { channel: string }, timestamp? }.
+// Senders include units on first contact (or when they change); the server remembers them per
+// device and expands each reading to the stored { channel: { value, units } } shape.
+const COMPACT_KEYS = new Set(['values', 'units', 'timestamp']);
+// device name -> Promise of its units map. Caching the promise (not the map) means concurrent
+// first readings share one lookup and merge new units into the same object.
+const unitsByDevice = new Map();
+
+function isCompact(body) {
+  const values = body?.values;
+  if (!values || typeof values !== 'object' || Array.isArray(values)) return false;
+  return Object.keys(body).every((k) => COMPACT_KEYS.has(k));
+}
+
+// A client's units map must be a plain object of strings, as in the OpenAPI compactData schema
+function isUnitsMap(sent) {
+  if (!sent || typeof sent !== 'object' || Array.isArray(sent)) return false;
+  return Object.values(sent).every((u) => typeof u === 'string');
+}
+
+async function loadUnits(deviceName) {
+  // First reading since start-up: recover units from the last stored reading. The cached map has
+  // no prototype, so channel names like "constructor" never resolve to inherited properties.
+  const units = Object.create(null);
+  const last = await store.latestDeviceData(deviceName);
+  for (const [channel, v] of Object.entries(last || {})) {
+    if (v && typeof v === 'object' && typeof v.units === 'string') units[channel] = v.units;
+  }
+  return units;
+}
+
+function knownUnits(deviceName) {
+  let pending = unitsByDevice.get(deviceName);
+  if (!pending) {
+    pending = loadUnits(deviceName);
+    unitsByDevice.set(deviceName, pending);
+    // Retry the lookup on the next reading rather than caching a failure
+    pending.catch(() => {
+      if (unitsByDevice.get(deviceName) === pending) unitsByDevice.delete(deviceName);
+    });
+  }
+  return pending;
+}
+
+async function expandCompact(req, res, next) {
+  try {
+    if (!isCompact(req.body)) return next();
+    const name = res.locals.device.name;
+    const { values, units: sent, timestamp } = req.body;
+    if (sent !== undefined && !isUnitsMap(sent)) {
+      return res.status(400).json({ error: 'units must be an object mapping channel names to unit strings' });
+    }
+    const units = await knownUnits(name);
+    for (const [channel, unit] of Object.entries(sent || {})) {
+      if (channel !== '__proto__') units[channel] = unit;
+    }
+
+    const data = {};
+    for (const [channel, value] of Object.entries(values)) {
+      if (channel === '__proto__') continue;
+      data[channel] = units[channel] !== undefined ? { value, units: units[channel] } : value;
+    }
+    if (timestamp !== undefined) data.timestamp = timestamp;
+    req.body = data;
+    next();
+  } catch (err) {
+    next(err);
+  }
+}
+
+const telemetryBody = [rawMsgpack, decodeTelemetry, expandCompact];
+
+module.exports = { telemetryBody };
@@ -1,7 +1,7 @@
 const express = require("express");
 const store = require('../datastore');
 const { isDatastoreForcedDisabled } = require('./admin');
-const { deviceMiddleware, apiKeyAuth } = require("../middleware");
+const { deviceMiddleware, apiKeyAuth, telemetryBody } = require("../middleware");
 const { upsertDevice } = require('../devicesFile');
 
 const router = express.Router();
@@ -107,10 +107,27 @@ const getHistoricalData = async (req, res) => {
   res.status(200).json(history);
 };
 
+// Readings may carry their own timestamp (epoch ms or ISO 8601), e.g. for backfills and
+// simulated history; otherwise the receive time is used. Far-future values are rejected.
+const MAX_FUTURE_SKEW_MS = 5 * 60 * 1000;
+
+function parseClientTimestamp(raw) {
+  if (raw === undefined || raw === null || raw === '') return { value: Date.now() };
+  let ms;
+  if (typeof raw === 'number') ms = raw;
+  else if (typeof raw === 'string' && /^\d+$/.test(raw)) ms = Number(raw);
+  else if (typeof raw === 'string') ms = Date.parse(raw);
+  if (!Number.isFinite(ms) || ms < 0) return { error: 'Invalid timestamp (expected epoch milliseconds or ISO 8601)' };
+  if (ms > Date.now() + MAX_FUTURE_SKEW_MS) return { error: 'Timestamp is in the future' };
+  return { value: Math.trunc(ms) };
+}
+
 const addData = async (req, res) => {
   const device = res.locals.device;
   const data = req.body || {};
-  data.timestamp = Date.now();
+  const ts = parseClientTimestamp(data.timestamp);
+  if (ts.error) return res.status(400).json({ error: ts.error });
+  data.timestamp = ts.value;
   await store.insertDeviceData(device.name, data);
   res.status(202).json();
 };
@@ -165,7 +182,7 @@ router.use("/:deviceName", deviceMiddleware);
 router.get("/:deviceName", getDevice);
 
 router.get("/:deviceName/data", getData);
-router.put("/:deviceName/data", addData);
+router.put("/:deviceName/data", telemetryBody, addData);
 
 router.get("/:deviceName/history", getHistoricalData);
 router.delete("/:deviceName/history", deleteData);
@@ -597,4 +597,65 @@ router.get('/admin/history', async (req, res) => {
     }
 });
 
+// Wait until the response can take more data (or the client went away)
+const waitForDrain = (res) => new Promise((resolve) => {
+    const done = () => {
+        res.off('drain', done);
+        res.off('close', done);
+        resolve();
+    };
+    res.on('drain', done);
+    res.on('close', done);
+});
+
+// Admin endpoint: Stream chat histories as NDJSON, one participant per line.
+// Optional filters: ?user=<username>&from=<date>&to=<date> (on lastUpdated, ISO or epoch ms)
+router.get('/admin/history/export', async (req, res) => {
+    let cursor;
+    try {
+        const filter = {};
+        if (req.query.user) {
+            filter.username = String(req.query.user).toLowerCase();
+        }
+        const range = {};
+        for (const [param, op] of [['from', '$gte'], ['to', '$lte']]) {
+            const raw = req.query[param];
+            if (!raw) continue;
+            const date = /^\d+$/.test(raw) ? new Date(Number(raw)) : new Date(raw);
+            if (Number.isNaN(date.getTime())) {
+                return res.status(400).json({ error: `Invalid '${param}' date` });
+            }
+            range[op] = date;
+        }
+        if (Object.keys(range).length) filter.lastUpdated = range;
+
+        const db = await connectDB();
+        cursor = db.collection('chat_history').find(filter).batchSize(100);
+
+        res.status(200);
+        res.setHeader('Content-Type', 'application/x-ndjson; charset=utf-8');
+        res.setHeader('Cache-Control', 'no-store');
+
+        let clientGone = false;
+        res.on('close', () => { clientGone = true; });
+        for await (const doc of cursor) {
+            if (clientGone) break;
+            if (!res.write(JSON.stringify(doc) + '\n')) {
+                await waitForDrain(res);
+            }
+        }
+        res.end();
+    } catch (error) {
+        console.error('Admin export history error:', error);
+        if (!res.headersSent) {
+            res.status(500).json({ error: 'Failed to export chat histories' });
+        } else {
+            // Headers are out; truncate the stream so the client sees an incomplete transfer
+            res.destroy(error);
+        }
+    } finally {
+        if (cursor) await cursor.close().catch(() => {});
+    }
+});
+
 module.exports = router;
@@ -0,0 +1,122 @@
+const request = require('supertest');
+
+let app; let server;
+function sleep(ms){ return new Promise(r=>setTimeout(r,ms)); }
+
+let msgpack = null;
+try { msgpack = require('@msgpack/msgpack'); } catch (_) { /* optional dependency */ }
+
+beforeAll(async () => {
+  process.env.DB_ENGINE='postgres';
+  process.env.PGHOST = process.env.PGHOST || 'localhost';
+  process.env.PGPORT = process.env.PGPORT || '5432';
+  process.env.PGUSER = process.env.PGUSER || 'postgres';
+  process.env.PGPASSWORD = process.env.PGPASSWORD || 'postgres';
+  process.env.PGDATABASE = process.env.PGDATABASE || 'abacws_test';
+  process.env.API_KEY = 'mp-key';
+  app = require('../src/app');
+  server = app.listen(0);
+  await sleep(300);
+});
+
+afterAll(async () => { try { await server.close(); } catch(_) {} });
+
+const agent = () => request(server);
+const authed = (r) => r.set('x-api-key','mp-key');
+const suffix = Date.now();
+const COMPACT = 'mp_compact_' + suffix;
+const RECOVER = 'mp_recover_' + suffix;
+const BINARY = 'mp_binary_' + suffix;
+
+// Readings use the receive time; keep sequential ones in distinct milliseconds so "latest" is unambiguous
+const putData = async (device, body) => { await sleep(2); return authed(agent().put(`/api/devices/${device}/data`)).send(body); };
+const latest = async (device) => (await agent().get(`/api/devices/${device}/data`)).body;
+
+describe('Compact and MessagePack device data', () => {
+  beforeAll(async () => {
+    for (const name of [COMPACT, RECOVER, BINARY]) {
+      await authed(agent().post('/api/devices')).send({ name, type:'sensor', floor:1, position:{x:1,y:1,z:1} });
+    }
+  });
+
+  test('Compact readings are expanded to { value, units }', async () => {
+    const res = await putData(COMPACT, { values: { humidity: 41.5, loudness: 52 }, units: { humidity: '%', loudness: 'dB' } });
+    expect(res.status).toBe(202);
+    const body = await latest(COMPACT);
+    expect(body.humidity).toEqual({ value: 41.5, units: '%' });
+    expect(body.loudness).toEqual({ value: 52, units: 'dB' });
+  });
+
+  test('Units sent once are remembered for later readings', async () => {
+    expect((await putData(COMPACT, { values: { humidity: 43, loudness: 49.5 } })).status).toBe(202);
+    let body = await latest(COMPACT);
+    expect(body.humidity).toEqual({ value: 43, units: '%' });
+    expect(body.loudness).toEqual({ value: 49.5, units: 'dB' });
+
+    // A later units map only changes the channels it names
+    expect((await putData(COMPACT, { values: { humidity: 0.44, loudness: 50 }, units: { humidity: 'ratio' } })).status).toBe(202);
+    body = await latest(COMPACT);
+    expect(body.humidity).toEqual({ value: 0.44, units: 'ratio' });
+    expect(body.loudness).toEqual({ value: 50, units: 'dB' });
+  });
+
+  test('Units are recovered from the last stored full-form reading', async () => {
+    // Full-form readings bypass the expander, so the first compact reading has to look units up
+    expect((await putData(RECOVER, { no2: { value: 120, units: 'ppb' }, uv_light: { value: 0.4, units: 'UV Index' } })).status).toBe(202);
+    expect((await putData(RECOVER, { values: { no2: 130, uv_light: 0.5, new_channel: 7 } })).status).toBe(202);
+    const body = await latest(RECOVER);
+    expect(body.no2).toEqual({ value: 130, units: 'ppb' });
+    expect(body.uv_light).toEqual({ value: 0.5, units: 'UV Index' });
+    expect(body.new_channel).toBe(7);
+  });
+
+  test('Concurrent first readings keep every units map', async () => {
+    const device = 'mp_race_' + suffix;
+    await authed(agent().post('/api/devices')).send({ name: device, type:'sensor', floor:1, position:{x:1,y:1,z:1} });
+    const results = await Promise.all([
+      putData(device, { values: { a: 1 }, units: { a: 'A' } }),
+      putData(device, { values: { b: 2 }, units: { b: 'B' } }),
+    ]);
+    expect(results.map(r => r.status)).toEqual([202, 202]);
+    expect((await putData(device, { values: { a: 3, b: 4 } })).status).toBe(202);
+    const body = await latest(device);
+    expect(body.a).toEqual({ value: 3, units: 'A' });
+    expect(body.b).toEqual({ value: 4, units: 'B' });
+  });
+
+  test('Units maps must be plain objects of strings and cannot touch the prototype', async () => {
+    const device = 'mp_units_' + suffix;
+    await authed(agent().post('/api/devices')).send({ name: device, type:'sensor', floor:1, position:{x:1,y:1,z:1} });
+    expect((await putData(device, { values: { hum: 40 }, units: { hum: { x: 1 } } })).status).toBe(400);
+    expect((await putData(device, { values: { hum: 40 }, units: ['%'] })).status).toBe(400);
+    expect((await putData(device, { values: { hum: 40 }, units: null })).status).toBe(400);
+
+    // Raw JSON: in an object literal __proto__ sets the prototype and would never be sent as a key
+    const nested = '{"values":{"temp":21},"units":{"__proto__":{"temp":"X"}}}';
+    expect((await authed(agent().put(`/api/devices/${device}/data`)).set('Content-Type', 'application/json').send(nested)).status).toBe(400);
+    const poisoned = '{"values":{"temp":21},"units":{"hum":"%","__proto__":"X"}}';
+    const res = await authed(agent().put(`/api/devices/${device}/data`)).set('Content-Type', 'application/json').send(poisoned);
+    expect(res.status).toBe(202);
+    expect((await putData(device, { values: { temp: 22, hum: 41, constructor: 1 } })).status).toBe(202);
+    const body = await latest(device);
+    expect(body.temp).toBe(22);
+    expect(body.hum).toEqual({ value: 41, units: '%' });
+    expect(body.constructor).toBe(1);
+  });
+
+  test('Malformed MessagePack is rejected (415 when the codec is not installed)', async () => {
+    const res = await authed(agent().put(`/api/devices/${BINARY}/data`))
+      .set('Content-Type', 'application/msgpack')
+      .send(Buffer.from([0xc1, 0x00, 0xff]));
+    expect(res.status).toBe(msgpack ? 400 : 415);
+  });
+
+  (msgpack ? test : test.skip)('MessagePack compact readings are decoded and expanded', async () => {
+    const body = Buffer.from(msgpack.encode({ values: { humidity: 30.25 }, units: { humidity: '%' } }));
+    const res = await authed(agent().put(`/api/devices/${BINARY}/data`))
+      .set('Content-Type', 'application/msgpack')
+      .send(body);
+    expect(res.status).toBe(202);
+    expect((await latest(BINARY)).humidity).toEqual({ value: 30.25, units: '%' });
+  });
+});
@@ -0,0 +1,54 @@
+const request = require('supertest');
+
+let app; let server;
+function sleep(ms){ return new Promise(r=>setTimeout(r,ms)); }
+
+beforeAll(async () => {
+  process.env.DB_ENGINE='postgres';
+  process.env.PGHOST = process.env.PGHOST || 'localhost';
+  process.env.PGPORT = process.env.PGPORT || '5432';
+  process.env.PGUSER = process.env.PGUSER || 'postgres';
+  process.env.PGPASSWORD = process.env.PGPASSWORD || 'postgres';
+  process.env.PGDATABASE = process.env.PGDATABASE || 'abacws_test';
+  process.env.API_KEY = 'ts-key';
+  app = require('../src/app');
+  server = app.listen(0);
+  await sleep(300);
+});
+
+afterAll(async () => { try { await server.close(); } catch(_) {} });
+
+const agent = () => request(server);
+const authed = (r) => r.set('x-api-key','ts-key');
+const DEVICE = 'ts_dev_' + Date.now();
+
+describe('Client-supplied reading timestamps', () => {
+  beforeAll(async () => {
+    await authed(agent().post('/api/devices')).send({ name: DEVICE, type:'sensor', floor:1, position:{x:1,y:1,z:1} });
+  });
+
+  test('Epoch milliseconds and ISO strings are stored as given', async () => {
+    const epoch = Date.UTC(2025, 0, 15, 8, 30);
+    const iso = '2025-01-16T09:45:00Z';
+    expect((await authed(agent().put(`/api/devices/${DEVICE}/data`)).send({ temperature: 20, timestamp: epoch })).status).toBe(202);
+    expect((await authed(agent().put(`/api/devices/${DEVICE}/data`)).send({ temperature: 21, timestamp: iso })).status).toBe(202);
+
+    const res = await agent().get(`/api/devices/${DEVICE}/history`).query({ from: epoch, to: Date.parse(iso) });
+    expect(res.status).toBe(200);
+    expect(res.body.map(r => r.timestamp).sort()).toEqual([epoch, Date.parse(iso)]);
+  });
+
+  test('Missing timestamp falls back to the receive time', async () => {
+    const before = Date.now();
+    expect((await authed(agent().put(`/api/devices/${DEVICE}/data`)).send({ temperature: 22 })).status).toBe(202);
+    const res = await agent().get(`/api/devices/${DEVICE}/data`);
+    expect(res.body.timestamp).toBeGreaterThanOrEqual(before);
+  });
+
+  test('400 for unparseable or far-future timestamps', async () => {
+    const bad = await authed(agent().put(`/api/devices/${DEVICE}/data`)).send({ temperature: 1, timestamp: 'yesterday-ish' });
+    expect(bad.status).toBe(400);
+    const future = await authed(agent().put(`/api/devices/${DEVICE}/data`)).send({ temperature: 1, timestamp: Date.now() + 3600 * 1000 });
+    expect(future.status).toBe(400);
+  });
+});
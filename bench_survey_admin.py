@@ -0,0 +1,261 @@
+"""bench_survey_admin.py
+Data-volume scaling benchmark for the survey admin read endpoints.
+
+`GET /survey/admin/questions` and `GET /survey/admin/history` read whole collections
+(`survey_db.users`, `survey_db.questions`, `survey_db.chat_history`). This script seeds a
+local Mongo instance with K users x M questions (plus a chat history of L messages per user),
+then measures each admin endpoint as the data grows:
+
+- request latency (min / median / p95 / max over N repeats)
+- response size in bytes
+- peak RSS of the API process while the requests run (needs `--api-pid` and psutil)
+
+Seeded documents carry `benchSeed: true` (and the username prefix `bench_`) and only those are
+removed between steps and on exit (pass `--keep` to leave the last step in place). Existing
+survey data is left untouched, even for participants named `bench_...`, but it
+is still read by the endpoints, so run against an otherwise empty database for clean numbers.
+
+Example run:
+  python bench_survey_admin.py --users 10,100,1000 --questions 10 --history 20
+  python bench_survey_admin.py --users 100,1000,5000 --questions 5,25 --history 50 \
+      --api-pid $(pgrep -f "node src/app.js") --out admin-scaling.csv
+
+Requires: pip install requests pymongo (psutil optional, for API memory)
+"""
+from __future__ import annotations
+import argparse
+import csv
+import itertools
+import statistics
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+try:
+    import requests  # type: ignore
+    from pymongo import MongoClient  # type: ignore
+except ImportError:
+    print("This script requires 'requests' and 'pymongo'. Install with: pip install requests pymongo")
+    sys.exit(1)
+
+from http_client import ApiSession, create_session
+
+try:
+    import psutil  # type: ignore
+except ImportError:
+    psutil = None
+
+DB_NAME = "survey_db"
+USER_PREFIX = "bench_"
+SEED_MARKER = {"benchSeed": True}
+ENDPOINTS = ["survey/admin/questions", "survey/admin/history"]
+INSERT_BATCH = 5000
+
+
+def parse_int_list(raw: str) -> List[int]:
+    return [int(x) for x in raw.split(",") if x.strip()]
+
+
+def clear_bench_data(db) -> None:
+    """Remove every document seeded by a previous step (and nothing else)."""
+    db.users.delete_many(SEED_MARKER)
+    db.questions.delete_many(SEED_MARKER)
+    db.chat_history.delete_many(SEED_MARKER)
+
+
+def _insert_batched(collection, docs) -> None:
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= INSERT_BATCH:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def seed(db, users: int, questions: int, history: int) -> None:
+    """Seed `users` users, each with `questions` questions and a `history`-message chat log."""
+    now = datetime.now(timezone.utc)
+    names = [f"{USER_PREFIX}{i:06d}" for i in range(users)]
+    user_ids = {}
+
+    user_docs = [
+        {
+            "username": name,
+            "displayName": name,
+            "roles": ["Occupants/Tenants/Employees"],
+            "createdAt": now,
+            "lastLogin": now,
+            "questionCount": questions,
+            "consentAccepted": True,
+            "consentDate": now,
+            **SEED_MARKER,
+        }
+        for name in names
+    ]
+    _insert_batched(db.users, user_docs)
+    for doc in user_docs:
+        user_ids[doc["username"]] = str(doc["_id"])
+
+    def question_docs():
+        for name in names:
+            for q in range(questions):
+                yield {
+                    "userId": user_ids[name],
+                    "username": name,
+                    "question": f"What is the temperature in Room {q:03d}? ({name})",
+                    "timestamp": now - timedelta(seconds=q),
+                    **SEED_MARKER,
+                }
+
+    def history_docs():
+        for name in names:
+            messages = [
+                {
+                    "sender": "user" if m % 2 == 0 else "bot",
+                    "text": f"Message {m} for {name}: how warm is the third floor right now?",
+                    "timestamp": (now + timedelta(seconds=m)).strftime("%H:%M:%S"),
+                }
+                for m in range(history)
+            ]
+            yield {"username": name, "messages": messages, "lastUpdated": now, **SEED_MARKER}
+
+    _insert_batched(db.questions, question_docs())
+    if history > 0:
+        _insert_batched(db.chat_history, history_docs())
+
+
+class RssSampler:
+    """Sample the API process RSS in a background thread and keep the peak."""
+
+    def __init__(self, pid: Optional[int], interval: float = 0.02):
+        self.proc = psutil.Process(pid) if (pid and psutil) else None
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        if self.proc:
+            self.peak = self.proc.memory_info().rss
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.peak = max(self.peak, self.proc.memory_info().rss)
+            except Exception:
+                return
+            time.sleep(self.interval)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        return False
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def measure(session: ApiSession, path: str, repeats: int, api_pid: Optional[int]) -> Dict[str, object]:
+    latencies: List[float] = []
+    size = 0
+    status = None
+    with RssSampler(api_pid) as sampler:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            r = session.get(path)
+            body = r.content
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            size = len(body)
+            status = r.status_code
+    return {
+        "status": status,
+        "min_ms": min(latencies),
+        "median_ms": statistics.median(latencies),
+        "p95_ms": percentile(latencies, 95),
+        "max_ms": max(latencies),
+        "bytes": size,
+        "api_peak_rss_mb": round(sampler.peak / (1024 * 1024), 1) if sampler.proc else None,
+    }
+
+
+def print_table(rows: List[Dict[str, object]]) -> None:
+    cols = ["endpoint", "users", "questions", "history", "status", "min_ms", "median_ms",
+            "p95_ms", "max_ms", "bytes", "api_peak_rss_mb"]
+    fmt = lambda v: f"{v:.1f}" if isinstance(v, float) else ("n/a" if v is None else str(v))
+    print("| " + " | ".join(cols) + " |")
+    print("|" + "|".join("---" for _ in cols) + "|")
+    for row in rows:
+        print("| " + " | ".join(fmt(row[c]) for c in cols) + " |")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark survey admin endpoints as data volume grows")
+    parser.add_argument("--api-base", default="http://localhost:5000/api")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017")
+    parser.add_argument("--users", default="10,100,1000", help="Comma-separated K values (users)")
+    parser.add_argument("--questions", default="10", help="Comma-separated M values (questions per user)")
+    parser.add_argument("--history", default="20", help="Comma-separated L values (chat messages per user)")
+    parser.add_argument("--repeats", type=int, default=5, help="Requests per endpoint per step")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--api-pid", type=int, default=None, help="PID of the API process (for RSS, needs psutil)")
+    parser.add_argument("--out", default="bench_survey_admin.csv", help="CSV results file")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded data from the last step")
+    args = parser.parse_args()
+
+    if args.api_pid and not psutil:
+        print("psutil is not installed; API memory will be reported as n/a (pip install psutil)")
+
+    db = MongoClient(args.mongo_uri)[DB_NAME]
+    # No retries: a retried request would hide the latency we are trying to measure
+    session = create_session(args.api_base, timeout=args.timeout, retries=0)
+    grid = list(itertools.product(parse_int_list(args.users), parse_int_list(args.questions),
+                                  parse_int_list(args.history)))
+    results: List[Dict[str, object]] = []
+
+    try:
+        for users, questions, history in grid:
+            clear_bench_data(db)
+            print(f"[bench] Seeding users={users} questions/user={questions} history/user={history} ...", flush=True)
+            t0 = time.perf_counter()
+            seed(db, users, questions, history)
+            print(f"[bench] Seeded in {time.perf_counter() - t0:.1f}s", flush=True)
+            for path in ENDPOINTS:
+                try:
+                    stats = measure(session, path, args.repeats, args.api_pid)
+                except requests.RequestException as e:
+                    print(f"[bench] {path} failed at users={users}: {e}", file=sys.stderr)
+                    stats = {"status": "error", "min_ms": None, "median_ms": None, "p95_ms": None,
+                             "max_ms": None, "bytes": None, "api_peak_rss_mb": None}
+                row = {"endpoint": path, "users": users, "questions": questions, "history": history, **stats}
+                results.append(row)
+                print(f"[bench]   {path}: median={row['median_ms']} ms bytes={row['bytes']}", flush=True)
+    except KeyboardInterrupt:
+        print("\n[bench] Interrupted; writing partial results.")
+    finally:
+        if not args.keep:
+            clear_bench_data(db)
+
+    if results:
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+            writer.writeheader()
+            writer.writerows(results)
+        print("")
+        print_table(results)
+        print(f"\nResults written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,275 @@
+"""bulk_history_download.py
+Parallel, resumable downloader for device history over long ranges.
+
+`POST /devices/history/bulk` accepts at most 200 devices and a 31-day window per call and
+returns at most 20,000 rows per device (newest first). This script splits a device set and
+date range into compliant chunks, fetches them concurrently and writes Parquet files:
+
+- Devices are grouped into batches of <= --max-devices, the range into windows of <= --max-days
+  (adjacent windows do not overlap; the API treats both ends as inclusive)
+- When a device comes back with exactly --row-cap rows, the window is split at the oldest
+  returned timestamp: rows newer than it are kept, and [from, oldest] is queued again for that
+  device until nothing is truncated
+- Every finished chunk is appended to <out>/_checkpoint.jsonl together with any follow-up
+  windows it queued, so an interrupted run resumes where it stopped (same arguments)
+- Chunk rows are written per device to <out>/parts/<device>/*.parquet and merged at the end
+  into <out>/<device>.parquet, sorted by timestamp. Channels `{value, units}` become one column
+  per channel holding the value.
+
+Example run:
+  python bulk_history_download.py --from 2025-01-01 --to 2026-01-01 --out history-2025
+  python bulk_history_download.py --devices node_5.01,node_5.02 --from 2025-06-01 --to 2025-09-01 --workers 8
+
+Requires: pip install requests pyarrow
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Tuple
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError:
+    print("This script requires the 'pyarrow' package. Install with: pip install pyarrow")
+    sys.exit(1)
+
+from http_client import IDEMPOTENT_METHODS, ApiSession, create_session
+from timeparse import parse_time
+
+DAY_MS = 24 * 60 * 60 * 1000
+CHECKPOINT_FILE = "_checkpoint.jsonl"
+
+# (devices, from_ms, to_ms); both ends inclusive, as in the API
+Chunk = Tuple[Tuple[str, ...], int, int]
+
+
+def chunk_id(chunk: Chunk) -> str:
+    devices, start, end = chunk
+    digest = hashlib.sha1(",".join(devices).encode("utf-8")).hexdigest()[:10]
+    return f"{start}-{end}-{digest}"
+
+
+def plan_chunks(devices: List[str], start: int, end: int, max_devices: int, max_days: int) -> List[Chunk]:
+    span = max_days * DAY_MS - 1
+    windows = []
+    cursor = start
+    while cursor <= end:
+        upper = min(cursor + span, end)
+        windows.append((cursor, upper))
+        cursor = upper + 1
+    batches = [tuple(devices[i:i + max_devices]) for i in range(0, len(devices), max_devices)]
+    return [(batch, lo, hi) for lo, hi in windows for batch in batches]
+
+
+def flatten(entry: dict) -> dict:
+    row = {"timestamp": int(entry.get("timestamp", 0))}
+    for key, val in entry.items():
+        if key == "timestamp":
+            continue
+        if isinstance(val, dict) and "value" in val:
+            val = val["value"]
+        elif isinstance(val, (dict, list)):
+            val = json.dumps(val)
+        row[key] = val
+    return row
+
+
+def to_table(rows: List[dict]) -> "pa.Table":
+    """Build a table with int64 timestamps, float64 numeric channels and string for anything mixed."""
+    columns: Dict[str, list] = {}
+    for i, row in enumerate(rows):
+        for key in row:
+            if key not in columns:
+                columns[key] = [None] * i
+        for key, values in columns.items():
+            values.append(row.get(key))
+    arrays = {}
+    for key, values in columns.items():
+        if key == "timestamp":
+            arrays[key] = pa.array(values, type=pa.int64())
+        elif all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values):
+            arrays[key] = pa.array(values, type=pa.float64())
+        else:
+            arrays[key] = pa.array([None if v is None else str(v) for v in values], type=pa.string())
+    return pa.table(arrays)
+
+
+def fetch_chunk(session: ApiSession, chunk: Chunk, out_dir: str, row_cap: int) -> Tuple[int, List[Chunk]]:
+    """Fetch one chunk, write its parts and return (row count, follow-up chunks)."""
+    devices, start, end = chunk
+    r = session.post("devices/history/bulk", json={"devices": list(devices), "from": start, "to": end, "format": "json"})
+    r.raise_for_status()
+    payload = r.json()
+    cid = chunk_id(chunk)
+    total = 0
+    followups: List[Chunk] = []
+    for item in payload.get("devices", []):
+        device = item.get("device")
+        history = item.get("history") or []
+        if len(history) >= row_cap:
+            oldest = min(int(e.get("timestamp", 0)) for e in history)
+            if start < oldest:
+                # Truncated: keep what is strictly newer than the cut, re-fetch the rest
+                history = [e for e in history if int(e.get("timestamp", 0)) > oldest]
+                followups.append(((device,), start, oldest))
+            else:
+                print(f"[bulk] {device}: {row_cap} rows share one window edge at {oldest}; cannot split further", file=sys.stderr)
+        if not history:
+            continue
+        rows = [flatten(e) for e in history]
+        part_dir = os.path.join(out_dir, "parts", device)
+        os.makedirs(part_dir, exist_ok=True)
+        tmp = os.path.join(part_dir, f"{cid}.parquet.tmp")
+        pq.write_table(to_table(rows), tmp)
+        os.replace(tmp, os.path.join(part_dir, f"{cid}.parquet"))
+        total += len(rows)
+    return total, followups
+
+
+def load_checkpoint(path: str) -> Tuple[set, List[Chunk]]:
+    done, followups = set(), []
+    if not os.path.exists(path):
+        return done, followups
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted write
+            done.add(rec["id"])
+            for fu in rec.get("followups", []):
+                followups.append((tuple(fu[0]), int(fu[1]), int(fu[2])))
+    return done, followups
+
+
+def unify_types(tables: List["pa.Table"]) -> List["pa.Table"]:
+    """Cast columns whose type differs between parts (e.g. float64 in one chunk, string in another) to string."""
+    seen: Dict[str, set] = {}
+    for table in tables:
+        for field in table.schema:
+            if not pa.types.is_null(field.type):
+                seen.setdefault(field.name, set()).add(field.type)
+    conflicting = {name for name, types in seen.items() if len(types) > 1}
+    if not conflicting:
+        return tables
+    unified = []
+    for table in tables:
+        for name in conflicting & set(table.column_names):
+            idx = table.schema.get_field_index(name)
+            if table.schema.field(idx).type != pa.string():
+                table = table.set_column(idx, name, table.column(name).cast(pa.string()))
+        unified.append(table)
+    return unified
+
+
+def concat(tables: List["pa.Table"]) -> "pa.Table":
+    tables = unify_types(tables)
+    try:
+        return pa.concat_tables(tables, promote_options="permissive")
+    except TypeError:
+        return pa.concat_tables(tables, promote=True)
+
+
+def merge_parts(out_dir: str) -> None:
+    parts_root = os.path.join(out_dir, "parts")
+    if not os.path.isdir(parts_root):
+        return
+    for device in sorted(os.listdir(parts_root)):
+        part_dir = os.path.join(parts_root, device)
+        files = sorted(f for f in os.listdir(part_dir) if f.endswith(".parquet"))
+        if not files:
+            continue
+        table = concat([pq.read_table(os.path.join(part_dir, f)) for f in files])
+        table = table.sort_by([("timestamp", "ascending")])
+        pq.write_table(table, os.path.join(out_dir, f"{device}.parquet"))
+        print(f"[bulk] {device}: {table.num_rows} rows -> {device}.parquet")
+
+
+def list_device_names(session: ApiSession) -> List[str]:
+    r = session.get("devices")
+    r.raise_for_status()
+    return [d["name"] for d in r.json() if d.get("name")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Download device history in API-compliant chunks")
+    parser.add_argument("--api-base", default="http://localhost:5000/api")
+    parser.add_argument("--devices", default=None, help="Comma-separated device names (default: all from GET /devices)")
+    parser.add_argument("--from", dest="start", required=True, help="Start (ISO date/datetime or epoch ms)")
+    parser.add_argument("--to", dest="end", default=None, help="End (ISO date/datetime or epoch ms; default: now)")
+    parser.add_argument("--out", default="history-export", help="Output directory")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-devices", type=int, default=200)
+    parser.add_argument("--max-days", type=int, default=31)
+    parser.add_argument("--row-cap", type=int, default=20000)
+    parser.add_argument("--no-merge", action="store_true", help="Leave per-chunk parts without merging")
+    args = parser.parse_args()
+
+    start = parse_time(args.start)
+    end = parse_time(args.end) if args.end else int(time.time() * 1000)
+    if start > end:
+        print("--from must be <= --to", file=sys.stderr)
+        return 2
+    os.makedirs(args.out, exist_ok=True)
+
+    # The bulk route is a read, so retrying its POST is safe
+    session = create_session(args.api_base, timeout=300, pool_size=args.workers,
+                             retry_methods=IDEMPOTENT_METHODS | {"POST"})
+    devices = args.devices.split(",") if args.devices else list_device_names(session)
+
+    checkpoint_path = os.path.join(args.out, CHECKPOINT_FILE)
+    done, resumed = load_checkpoint(checkpoint_path)
+    queue = [c for c in plan_chunks(devices, start, end, args.max_devices, args.max_days) + resumed
+             if chunk_id(c) not in done]
+    print(f"[bulk] {len(devices)} devices, {len(queue)} chunks to fetch ({len(done)} already done)")
+
+    rows_total = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool, open(checkpoint_path, "a", encoding="utf-8") as ckpt:
+        running = {}
+        try:
+            while queue or running:
+                while queue and len(running) < args.workers:
+                    chunk = queue.pop(0)
+                    running[pool.submit(fetch_chunk, session, chunk, args.out, args.row_cap)] = chunk
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    chunk = running.pop(fut)
+                    try:
+                        count, followups = fut.result()
+                    except Exception as e:
+                        failed += 1
+                        print(f"[bulk] Chunk {chunk_id(chunk)} failed: {e}", file=sys.stderr)
+                        continue
+                    rows_total += count
+                    queue.extend(followups)
+                    ckpt.write(json.dumps({"id": chunk_id(chunk), "rows": count,
+                                           "followups": [[list(d), s, e] for d, s, e in followups]}) + "\n")
+                    ckpt.flush()
+                    print(f"[bulk] {chunk_id(chunk)}: {count} rows, {len(followups)} split(s); {len(queue)} queued")
+        except KeyboardInterrupt:
+            print("\n[bulk] Interrupted; finished chunks are checkpointed. Re-run to resume.")
+            for fut in running:
+                fut.cancel()
+            return 130
+
+    print(f"[bulk] Fetched {rows_total} rows; {failed} chunk(s) failed")
+    if failed:
+        print("[bulk] Re-run with the same arguments to retry failed chunks before merging.")
+        return 1
+    if not args.no_merge:
+        merge_parts(args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,6 +5,7 @@ Features:
 - Ensures the device exists (creates if missing)
 - Sends random telemetry payload every N seconds using PUT /api/devices/{deviceName}/data
 - Supports graceful shutdown (Ctrl+C)
+- Reuses one pooled keep-alive HTTP session (see http_client.py) instead of a new connection per tick
 - Optional base URL & interval via env vars
 
 Env Vars:
@@ -25,16 +26,11 @@ from __future__ import annotations
 import os
 import sys
 import time
-import json
 import random
 import signal
 from typing import Any, Dict
 
-try:
-    import requests  # type: ignore
-except ImportError:
-    print("This script requires the 'requests' package. Install with: pip install requests")
-    sys.exit(1)
+from http_client import create_session
 
 API_BASE = os.environ.get("ABACWS_API_BASE", "http://localhost:5000/api")
 DEVICE_NAME = os.environ.get("DEVICE_NAME", "node_5.03")
@@ -42,9 +38,8 @@ INTERVAL = float(os.environ.get("INTERVAL_SEC", "5"))
 FLOOR = int(os.environ.get("FLOOR", "5"))
 API_KEY = os.environ.get("API_KEY")  # optional
 
-HEADERS = {"Content-Type": "application/json"}
-if API_KEY:
-    HEADERS["x-api-key"] = API_KEY
+# One pooled keep-alive session for every call (x-api-key added when API_KEY is set)
+SESSION = create_session(API_BASE, api_key=API_KEY)
 
 # Basic sample types you can expand
 DEVICE_TYPE = "demo_sensor"
@@ -60,15 +55,11 @@ signal.signal(signal.SIGINT, handle_sig)
 signal.signal(signal.SIGTERM, handle_sig)
 
 
-def api_url(path: str) -> str:
-    return f"{API_BASE.rstrip('/')}/{path.lstrip('/')}"
-
-
 def ensure_device_exists() -> None:
     """Create the demo device if it does not already exist."""
     # List devices quickly (could also GET /devices/node_5.20)
     try:
-        r = requests.get(api_url("devices"), timeout=10)
+        r = SESSION.get("devices")
         r.raise_for_status()
     except Exception as e:
         print(f"Failed to list devices: {e}")
@@ -87,7 +78,7 @@ def ensure_device_exists() -> None:
         "pinned": False,
     }
     try:
-        cr = requests.post(api_url("devices"), headers=HEADERS, data=json.dumps(payload), timeout=10)
+        cr = SESSION.post("devices", json=payload)
         if cr.status_code in (200, 201):
             print(f"Created device '{DEVICE_NAME}'.")
         elif cr.status_code == 409:
@@ -124,7 +115,7 @@ def send_data_loop():
         payload = generate_payload(counter)
         try:
             # PUT /devices/{deviceName}/data (202 Accepted expected)
-            r = requests.put(api_url(f"devices/{DEVICE_NAME}/data"), headers=HEADERS, data=json.dumps(payload), timeout=10)
+            r = SESSION.put(f"devices/{DEVICE_NAME}/data", json=payload)
             if r.status_code not in (200, 202):
                 print(f"Warning: unexpected status {r.status_code}: {r.text[:120]}")
             else:
@@ -136,6 +127,7 @@ def send_data_loop():
         while running and slept < INTERVAL:
             time.sleep(min(0.5, INTERVAL - slept))
             slept += 0.5
+    SESSION.close()
     print("Sender stopped.")
 
 
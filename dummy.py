@@ -1,16 +1,30 @@
-import requests
+import heapq
 import json
 import time
 import random
 import logging
 import os
-from typing import List, Dict
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple
+
+from http_client import ApiSession, RequestTimer, TelemetryEncoder, create_session
+from profiling import Profiler
 
 # Configurations (can be set via environment variables)
 API_BASE = os.getenv("API_BASE", "http://localhost:8090/api")
 API_KEY = os.getenv("API_KEY", "V3rySecur3Pas3word")
 INTERVAL_SECONDS = int(os.getenv("INTERVAL_SECONDS", "10"))
-HEADERS = {"Content-Type": "application/json", "x-api-key": API_KEY}
+# Optional per-device cadences: devices.json-style file whose entries may add
+# "interval_seconds" (or "rate_per_minute") and "jitter" (fraction of the interval)
+DEVICE_PROFILE_FILE = os.getenv("DEVICE_PROFILE_FILE", "")
+JITTER = float(os.getenv("JITTER", "0.05"))
+SEND_WORKERS = int(os.getenv("SEND_WORKERS", "8"))
+# PROFILE=phases|cprofile|tracemalloc|all (comma-separated), output in PROFILE_DIR; see profiling.py
+PROFILER = Profiler.from_env("dummy")
+# WIRE_FORMAT=json|msgpack, WIRE_GZIP, UNITS_ONCE; see http_client.TelemetryEncoder
+ENCODER = TelemetryEncoder.from_env()
 
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +36,24 @@ def build_device_names() -> List[str]:
     """Return list of device names, skipping 'node_5.22'."""
     return [f"node_5.{i:02d}" for i in range(1, 35) if i != 22]
 
+def load_device_profiles(path: str) -> List[Tuple[str, float, float]]:
+    """Return (name, interval seconds, jitter fraction) per device from a profile file."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    entries = data.get("devices", []) if isinstance(data, dict) else data
+    profiles = []
+    for d in entries:
+        if not d.get("name"):
+            continue
+        if d.get("interval_seconds"):
+            interval = float(d["interval_seconds"])
+        elif d.get("rate_per_minute"):
+            interval = 60.0 / float(d["rate_per_minute"])
+        else:
+            interval = float(INTERVAL_SECONDS)
+        profiles.append((d["name"], max(interval, 0.01), float(d.get("jitter", JITTER))))
+    return profiles
+
 def generate_sensor_data() -> Dict[str, dict]:
     """Generate synthetic sensor data payload for all channels."""
     return {
@@ -37,41 +69,131 @@ def generate_sensor_data() -> Dict[str, dict]:
         "no2": {"value": random.randint(100, 300), "units": ""},
     }
 
-def send(session: requests.Session, device_name: str, payload: dict) -> bool:
-    url = f"{API_BASE}/devices/{device_name}/data"
+def send(session: ApiSession, device_name: str, payload: dict) -> bool:
     try:
-        r = session.put(url, headers=HEADERS, data=json.dumps(payload), timeout=30)
-        r.raise_for_status()
+        with PROFILER.phase("encode"):
+            body, headers = ENCODER.encode(device_name, payload)
+        with PROFILER.phase("network"):
+            r = session.put(f"devices/{device_name}/data", data=body, headers=headers)
+            r.raise_for_status()
         logging.debug(f"Sent data to {device_name}: {payload}")
         return True
     except Exception as e:
+        # The server may not have stored this reading's units; resend them next time
+        ENCODER.forget(device_name)
         logging.error(f"Error sending to {device_name}: {e}")
         return False
 
+class Scheduler:
+    """Timer heap of (due, seq, device index); each device fires on its own interval.
+
+    Devices start at a random phase within their interval so they do not fire together.
+    Each slot is base + k * interval plus a fresh jitter, so jitter and send time never
+    accumulate into drift. Slots missed by more than one interval (overload) are skipped.
+    """
+
+    def __init__(self, profiles: List[Tuple[str, float, float]]):
+        self.profiles = profiles
+        now = time.monotonic()
+        self.base = [now + random.uniform(0.0, interval) for _, interval, _ in profiles]
+        self.heap = [(self.base[i], i, i) for i in range(len(profiles))]
+        heapq.heapify(self.heap)
+        self.seq = len(profiles)
+        self.skipped = 0
+
+    def next_due(self) -> float:
+        return self.heap[0][0]
+
+    def pop(self) -> Tuple[int, float]:
+        """Remove the earliest slot, schedule that device's next one; return (index, lateness)."""
+        due, _, i = heapq.heappop(self.heap)
+        _, interval, jitter = self.profiles[i]
+        now = time.monotonic()
+        base = self.base[i] + interval
+        if base + interval < now:
+            missed = int((now - base) // interval)
+            self.skipped += missed
+            base += missed * interval
+        self.base[i] = base
+        offset = random.uniform(-jitter, jitter) * interval if jitter > 0 else 0.0
+        self.seq += 1
+        heapq.heappush(self.heap, (base + offset, self.seq, i))
+        return i, now - due
+
+def handle_sigterm(signum, frame):
+    # telemetry/server.py stops us with SIGTERM; shut down as on Ctrl+C so summaries and profiles are written
+    raise KeyboardInterrupt
+
 def main():
-    device_names = build_device_names()
-    error_counts = {name: 0 for name in device_names}
-    logging.info(f"Sending to {len(device_names)} devices every {INTERVAL_SECONDS}s...")
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    if DEVICE_PROFILE_FILE:
+        profiles = load_device_profiles(DEVICE_PROFILE_FILE)
+    else:
+        profiles = [(name, float(INTERVAL_SECONDS), JITTER) for name in build_device_names()]
+    if not profiles:
+        logging.error(f"No devices found in {DEVICE_PROFILE_FILE}")
+        return
+    error_counts = {name: 0 for name, _, _ in profiles}
+    counts_lock = threading.Lock()
+    rate = sum(1.0 / interval for _, interval, _ in profiles)
+    logging.info(f"Sending to {len(profiles)} devices, {rate:.1f} readings/s on average "
+                 f"({ENCODER.wire_format}, gzip={ENCODER.gzip}, units_once={ENCODER.units_once})...")
+
+    timer = RequestTimer()
+    scheduler = Scheduler(profiles)
+    # Bound queued sends so a slow API applies backpressure instead of growing memory
+    in_flight = threading.BoundedSemaphore(SEND_WORKERS * 4)
+
+    # cProfile only records the main thread; send inline while it is on so the sends are profiled
+    inline = PROFILER.cprofile_enabled
+    if inline:
+        logging.info("cProfile enabled: sending on the main thread instead of the worker pool")
+
+    def send_job(session: ApiSession, name: str, payload: dict) -> None:
+        try:
+            if not send(session, name, payload):
+                with counts_lock:
+                    error_counts[name] += 1
+        finally:
+            in_flight.release()
 
-    with requests.Session() as session:
+    PROFILER.start()
+    with create_session(API_BASE, api_key=API_KEY, timeout=30, on_timing=timer,
+                        pool_size=SEND_WORKERS) as session, \
+            ThreadPoolExecutor(max_workers=SEND_WORKERS) as pool:
         try:
+            sent, max_late, last_report = 0, 0.0, time.monotonic()
             while True:
-                cycle_start = time.time()
-                for name in device_names:
+                delay = scheduler.next_due() - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                i, late = scheduler.pop()
+                name = profiles[i][0]
+                with PROFILER.phase("generate"):
                     payload = generate_sensor_data()
-                    if not send(session, name, payload):
-                        error_counts[name] += 1
-                elapsed = time.time() - cycle_start
-                to_sleep = max(0, INTERVAL_SECONDS - elapsed)
-                logging.info(f"Batch sent. Sleeping for {to_sleep:.1f} seconds.")
-                time.sleep(to_sleep)
+                in_flight.acquire()
+                if inline:
+                    send_job(session, name, payload)
+                else:
+                    pool.submit(send_job, session, name, payload)
+                sent += 1
+                max_late = max(max_late, late)
+                now = time.monotonic()
+                if now - last_report >= INTERVAL_SECONDS:
+                    logging.info(f"Sent {sent} readings in {now - last_report:.1f}s "
+                                 f"(max lateness {max_late * 1000.0:.0f} ms, {scheduler.skipped} slots skipped)")
+                    sent, max_late, last_report = 0, 0.0, now
         except KeyboardInterrupt:
             logging.info("Graceful shutdown by user.")
+            pool.shutdown(wait=True)
+            logging.info(f"Requests: {timer.summary()}")
             failed = {k: v for k, v in error_counts.items() if v > 0}
             if failed:
                 logging.info("Error summary per device:")
                 for device, count in failed.items():
                     logging.info(f"{device}: {count} errors")
+            for line in PROFILER.stop():
+                logging.info(line)
             logging.info("Shutdown complete.")
 
 if __name__ == "__main__":
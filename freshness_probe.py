@@ -0,0 +1,347 @@
+"""freshness_probe.py
+End-to-end freshness probe: how long a reading takes to become visible to users,
+not just how fast it is written.
+
+Each probe reading is unique to the run, written at a recorded send time, and then watched for
+on the read surfaces fed by that write path:
+
+  --write api    (default) PUT /devices/{name}/data with a marker field, watched on
+                 data    polling GET /devices/{name}/data      (internal latest reading)
+  --write mysql  INSERT a marker row into the mapped external table of --device (the same
+                 insert mysql_dummy_publisher.py does), watched on
+                 latest  polling GET /latest                   (mapped external latest values)
+                 sse     subscribed to GET /stream/events      ('latest' events from the 8 s tick() loop)
+
+`/latest` and SSE only read mapped external tables, so a PUT never reaches them; the mysql
+write path is how their ingest-to-visible delay is measured. The marker row carries a run-unique
+value in every mapped value column and the send time (whole seconds) in the timestamp column;
+a surface has shown it once the device's entry has that timestamp and value.
+
+Surfaces only ever show the newest reading, so when a surface shows probe N, earlier probes it
+never showed are counted as visible at the same moment (they were superseded, not lost).
+
+The probe records the write-to-visible delay per surface and prints the distribution
+(p50 / p90 / p99 / max) plus the write round trip for comparison. Readings that never show
+up within --timeout are counted as missed.
+
+The mysql path connects to the MySQL server the API reads mapped tables from (engine=mysql)
+and writes real rows into the mapped table: in the wide (pivot) layout the probe row leaves the
+other sensors' columns empty until the next publisher tick, so use it against test data.
+
+Example run:
+  python freshness_probe.py --device node_5.03 --count 30 --interval 2
+  python freshness_probe.py --write mysql --device node_5.03 --count 20 --interval 10 --csv freshness.csv
+
+Requires: pip install requests (and PyMySQL for --write mysql)
+"""
+from __future__ import annotations
+import argparse
+import csv
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from urllib3.exceptions import ReadTimeoutError
+
+from http_client import ApiSession, create_session
+
+SURFACES_BY_WRITE = {"api": ("data",), "mysql": ("latest", "sse")}
+SSE_READ_TIMEOUT = 300.0  # seconds of stream silence before reconnecting
+
+
+class ProbeState:
+    """Thread-safe bookkeeping of sent probes and when each surface first showed them."""
+
+    def __init__(self, surfaces):
+        self.lock = threading.Lock()
+        self.sent: Dict[str, float] = {}          # marker -> send time (epoch ms), in send order
+        self.write_ms: Dict[str, float] = {}      # marker -> write round trip (ms)
+        self.rows: Dict[str, Tuple[int, float]] = {}  # marker -> (timestamp second, value) for mapped rows
+        self.seen: Dict[str, Dict[str, float]] = {s: {} for s in surfaces}  # surface -> marker -> delay ms
+
+    def record_sent(self, marker: str, sent_ms: float, write_ms: float, row: Optional[Tuple[int, float]] = None) -> None:
+        with self.lock:
+            self.sent[marker] = sent_ms
+            self.write_ms[marker] = write_ms
+            if row is not None:
+                self.rows[marker] = row
+
+    def _mark_upto(self, surface: str, newest: str, now: float) -> None:
+        # Caller holds the lock. Probes sent before `newest` were superseded by it.
+        seen = self.seen[surface]
+        for marker, sent in self.sent.items():
+            if marker not in seen:
+                seen[marker] = now - sent
+            if marker == newest:
+                break
+
+    def mark_by_marker(self, surface: str, text: str) -> None:
+        now = time.time() * 1000.0
+        with self.lock:
+            shown = [m for m in self.sent if m in text]
+            if shown:
+                self._mark_upto(surface, shown[-1], now)
+
+    def mark_by_row(self, surface: str, entry: Optional[dict]) -> None:
+        """Match a /latest or SSE device entry ({timestamp, values}) against the inserted rows."""
+        if not entry or entry.get("timestamp") is None:
+            return
+        try:
+            second = int(float(entry["timestamp"]) // 1000)
+            values = [float(v) for v in (entry.get("values") or {}).values() if v is not None]
+        except (TypeError, ValueError):
+            return
+        now = time.time() * 1000.0
+        with self.lock:
+            shown = [m for m, (ts, value) in self.rows.items()
+                     if ts == second and any(abs(v - value) < 1e-6 for v in values)]
+            if shown:
+                self._mark_upto(surface, shown[-1], now)
+
+
+def device_entry(body, device: str) -> Optional[dict]:
+    """Entry of `device` in a /latest map or an SSE 'external-latest' event."""
+    if not isinstance(body, dict):
+        return None
+    if isinstance(body.get("data"), dict):
+        body = body["data"]
+    entry = body.get(device)
+    return entry if isinstance(entry, dict) else None
+
+
+def poll_surface(session: ApiSession, surface: str, path: str, device: str,
+                 state: ProbeState, stop: threading.Event, interval: float) -> None:
+    while not stop.is_set():
+        try:
+            r = session.get(path)
+            if r.ok:
+                if surface == "data":
+                    state.mark_by_marker(surface, r.text)
+                else:
+                    state.mark_by_row(surface, device_entry(r.json(), device))
+        except Exception as e:
+            print(f"[probe] {surface} poll error: {e}", file=sys.stderr)
+        stop.wait(interval)
+
+
+def follow_sse(session: ApiSession, device: str, state: ProbeState, stop: threading.Event) -> None:
+    while not stop.is_set():
+        try:
+            # The stream can sit idle between 'latest' ticks; a long read timeout avoids churn
+            with session.get("stream/events", stream=True, timeout=(5, SSE_READ_TIMEOUT)) as r:
+                event = None
+                for raw in r.iter_lines(decode_unicode=True):
+                    if stop.is_set():
+                        return
+                    if not raw:
+                        event = None
+                        continue
+                    if raw.startswith("event:"):
+                        event = raw[6:].strip()
+                    elif raw.startswith("data:") and event == "latest":
+                        state.mark_by_row("sse", device_entry(json.loads(raw[5:]), device))
+        except (requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError) as e:
+            # requests reports an idle read timeout mid-stream as ConnectionError(ReadTimeoutError):
+            # reconnect straight away and only report real connection failures
+            if stop.is_set():
+                return
+            if isinstance(e, requests.exceptions.ReadTimeout) or (e.args and isinstance(e.args[0], ReadTimeoutError)):
+                continue
+            print(f"[probe] SSE reconnecting after error: {e}", file=sys.stderr)
+            stop.wait(1.0)
+        except Exception as e:
+            if not stop.is_set():
+                print(f"[probe] SSE reconnecting after error: {e}", file=sys.stderr)
+                stop.wait(1.0)
+
+
+def build_payload(marker: str, seq: int, sent_ms: float) -> dict:
+    return {
+        "probe_marker": marker,
+        "probe_sent_ms": sent_ms,
+        "probe_seq": {"value": seq, "units": ""},
+        "humidity": {"value": round(random.uniform(15.0, 60.0), 2), "units": "%"},
+        "loudness": {"value": round(random.uniform(30.0, 80.0), 1), "units": "dB"},
+    }
+
+
+class ApiWriter:
+    label = "PUT round trip"
+
+    def __init__(self, session: ApiSession, device: str):
+        self.session = session
+        self.device = device
+
+    def write(self, marker: str, seq: int, sent_ms: float) -> None:
+        r = self.session.put(f"devices/{self.device}/data", json=build_payload(marker, seq, sent_ms))
+        r.raise_for_status()
+
+    def close(self) -> None:
+        pass
+
+
+class MappedTableWriter:
+    """Inserts probe rows into the external table that --device is mapped to."""
+
+    label = "INSERT round trip"
+
+    def __init__(self, session: ApiSession, device: str, args):
+        try:
+            import pymysql  # type: ignore
+        except ImportError:
+            print("This script requires the 'PyMySQL' package for --write mysql. Install with: pip install PyMySQL")
+            sys.exit(1)
+        r = session.get("mappings")
+        r.raise_for_status()
+        mapping = next((m for m in r.json() if m.get("device_name") == device), None)
+        if mapping is None:
+            raise SystemExit(f"[probe] {device} has no external mapping; /latest and SSE never show it")
+        r = session.get("datasources")
+        r.raise_for_status()
+        source = next((d for d in r.json() if d.get("id") == mapping["data_source_id"]), {})
+        schema = source.get("schema") or args.mysql_db
+        table, ts_col = mapping["table_name"], mapping["timestamp_column"]
+        cols = mapping["value_columns"]
+        cols = json.loads(cols) if isinstance(cols, str) else list(cols)
+        if str(mapping["device_id_column"]).upper() == "COLUMN":
+            # Wide (pivot) layout: one row per timestamp, one column per sensor
+            names, self.fixed = [ts_col] + cols, []
+        else:
+            names, self.fixed = [mapping["device_id_column"], ts_col] + cols, [mapping["device_identifier_value"]]
+        marks = ["%s"] * len(self.fixed) + ["FROM_UNIXTIME(%s)"] + ["%s"] * len(cols)
+        self.sql = (f"INSERT INTO `{schema}`.`{table}` (" + ", ".join(f"`{c}`" for c in names) + ") "
+                    f"VALUES ({', '.join(marks)})")
+        self.width = len(cols)
+        # Run-unique integer values stay exact in FLOAT columns (< 2**24)
+        self.base = random.randint(100, 999) * 10000
+        self.conn = pymysql.connect(host=args.mysql_host, port=args.mysql_port, user=args.mysql_user,
+                                    password=args.mysql_password, autocommit=True)
+        print(f"[probe] Writing marker rows to {schema}.{table} ({', '.join(cols)})")
+
+    def write(self, marker: str, seq: int, sent_ms: float) -> Tuple[int, float]:
+        second, value = int(sent_ms // 1000), float(self.base + seq)
+        with self.conn.cursor() as cur:
+            cur.execute(self.sql, self.fixed + [second] + [value] * self.width)
+        return second, value
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {"p50": statistics.median(ordered), "p90": pick(0.90), "p99": pick(0.99), "max": ordered[-1]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure write-to-visible delay for device readings")
+    parser.add_argument("--api-base", default="http://localhost:5000/api")
+    parser.add_argument("--device", default="node_5.03")
+    parser.add_argument("--write", choices=sorted(SURFACES_BY_WRITE), default="api",
+                        help="api: PUT device data (data surface); mysql: insert into the mapped table (latest, sse)")
+    parser.add_argument("--count", type=int, default=20, help="Number of probe readings to send")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between probe readings")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for the last reading to surface")
+    parser.add_argument("--poll-interval", type=float, default=0.25, help="Polling period for data/latest")
+    parser.add_argument("--surfaces", default=None, help="Comma-separated subset of the surfaces fed by --write")
+    parser.add_argument("--mysql-host", default=os.getenv("MYSQL_HOST", "localhost"))
+    parser.add_argument("--mysql-port", type=int, default=int(os.getenv("MYSQL_PORT", "3307")))
+    parser.add_argument("--mysql-user", default=os.getenv("MYSQL_USER", "root"))
+    parser.add_argument("--mysql-password", default=os.getenv("MYSQL_PASSWORD", "mysql"))
+    parser.add_argument("--mysql-db", default=os.getenv("MYSQL_DATABASE", "abacws"),
+                        help="Schema of mapped tables whose data source has none (the API's database)")
+    parser.add_argument("--csv", default=None, help="Write per-reading delays to this CSV file")
+    args = parser.parse_args()
+
+    fed = SURFACES_BY_WRITE[args.write]
+    surfaces = list(fed) if args.surfaces is None else [s for s in args.surfaces.split(",") if s]
+    unfed = [s for s in surfaces if s not in fed]
+    if unfed or not surfaces:
+        print(f"[probe] --write {args.write} only feeds {', '.join(fed)}; cannot watch {', '.join(unfed) or 'nothing'}",
+              file=sys.stderr)
+        return 2
+    state = ProbeState(surfaces)
+    stop = threading.Event()
+    # Probes must not retry: a retried request would skew the delay being measured
+    session = create_session(args.api_base, retries=0, pool_size=len(surfaces) + 1)
+    writer = ApiWriter(session, args.device) if args.write == "api" else MappedTableWriter(session, args.device, args)
+    run_id = uuid.uuid4().hex[:8]
+
+    threads = []
+    if "data" in surfaces:
+        threads.append(threading.Thread(target=poll_surface, daemon=True, args=(
+            session, "data", f"devices/{args.device}/data", args.device, state, stop, args.poll_interval)))
+    if "latest" in surfaces:
+        threads.append(threading.Thread(target=poll_surface, daemon=True, args=(
+            session, "latest", "latest", args.device, state, stop, args.poll_interval)))
+    if "sse" in surfaces:
+        threads.append(threading.Thread(target=follow_sse, daemon=True, args=(session, args.device, state, stop)))
+    for t in threads:
+        t.start()
+
+    print(f"[probe] run={run_id} device={args.device} count={args.count} write={args.write} surfaces={','.join(surfaces)}")
+    try:
+        for seq in range(args.count):
+            marker = f"probe-{run_id}-{seq:05d}"
+            sent_ms = time.time() * 1000.0
+            start = time.perf_counter()
+            try:
+                row = writer.write(marker, seq, sent_ms)
+            except Exception as e:
+                print(f"[probe] Write failed for {marker}: {e}", file=sys.stderr)
+                continue
+            state.record_sent(marker, sent_ms, (time.perf_counter() - start) * 1000.0, row)
+            time.sleep(args.interval)
+
+        deadline = time.time() + args.timeout
+        while time.time() < deadline:
+            with state.lock:
+                done = all(len(state.seen[s]) >= len(state.sent) for s in surfaces)
+            if done:
+                break
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        print("\n[probe] Interrupted; reporting partial results.")
+    finally:
+        stop.set()
+        writer.close()
+
+    with state.lock:
+        markers = list(state.sent)
+        write_stats = summarize(list(state.write_ms.values()))
+        rows = [(writer.label, len(markers), 0, write_stats)]
+        for s in surfaces:
+            delays = [state.seen[s][m] for m in markers if m in state.seen[s]]
+            rows.append((s, len(delays), len(markers) - len(delays), summarize(delays)))
+
+        fmt = lambda v: "n/a" if v is None else f"{v:.0f}"
+        print("")
+        print("| surface | visible | missed | p50 ms | p90 ms | p99 ms | max ms |")
+        print("|---|---|---|---|---|---|---|")
+        for name, ok, missed, st in rows:
+            print(f"| {name} | {ok} | {missed} | {fmt(st['p50'])} | {fmt(st['p90'])} | {fmt(st['p99'])} | {fmt(st['max'])} |")
+
+        if args.csv:
+            with open(args.csv, "w", newline="", encoding="utf-8") as f:
+                writer_csv = csv.writer(f)
+                writer_csv.writerow(["marker", "sent_ms", "write_ms"] + [f"{s}_delay_ms" for s in surfaces])
+                for m in markers:
+                    writer_csv.writerow([m, f"{state.sent[m]:.0f}", f"{state.write_ms[m]:.1f}"] +
+                                        [f"{state.seen[s][m]:.0f}" if m in state.seen[s] else "" for s in surfaces])
+            print(f"\nPer-reading delays written to {args.csv}")
+    session.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,260 @@
+"""http_client.py
+Shared, connection-pooled HTTP client for the Python tools (dummy.py, demo.py,
+view_survey_data.py, verify_survey_flow.py, ...).
+
+Features:
+- One keep-alive `requests.Session` with sized connection pools
+- Retry with exponential backoff on idempotent calls (GET/HEAD/OPTIONS/DELETE) for read
+  errors and 502/503/504 responses. Every method is retried on connection errors and on 429
+  (the request was not processed), honouring Retry-After. PUT is not retried otherwise:
+  PUT /devices/{name}/data appends a reading, so a resend after a lost response would store
+  it twice. Pass retry=True on a single call (or retry_methods=...) to opt in.
+- Optional gzip for responses (Accept-Encoding)
+- Consistent `x-api-key` handling and a default per-request timeout
+- Optional timing hook called after every response
+- TelemetryEncoder: device readings as JSON or MessagePack, optionally gzip-compressed,
+  in the compact "units once" schema that sends units only on first contact
+
+Env Vars (used as defaults by create_session):
+  API_KEY            sent as x-api-key when set
+  HTTP_TIMEOUT       default per-request timeout in seconds (default: 10)
+  HTTP_POOL_SIZE     max pooled connections per host (default: 10)
+  HTTP_RETRIES       retry attempts on idempotent calls (default: 3)
+  HTTP_BACKOFF       backoff factor in seconds (default: 0.5)
+  HTTP_GZIP          'false' to request identity-encoded responses (default: true)
+  WIRE_FORMAT        'json' or 'msgpack' for TelemetryEncoder.from_env (default: json)
+  WIRE_GZIP          'true' to gzip request bodies (default: false)
+  UNITS_ONCE         'true' to use the compact units-once schema (default: false)
+
+Example:
+  from http_client import create_session
+  with create_session("http://localhost:5000/api") as s:
+      s.put("devices/node_5.03/data", json=payload)
+"""
+from __future__ import annotations
+import gzip as gzip_codec
+import json
+import os
+import sys
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+try:
+    import requests  # type: ignore
+    from requests.adapters import HTTPAdapter  # type: ignore
+    from urllib3.util.retry import Retry  # type: ignore
+except ImportError:
+    print("This script requires the 'requests' package. Install with: pip install requests")
+    sys.exit(1)
+
+try:
+    import msgpack  # type: ignore
+except ImportError:  # only needed for WIRE_FORMAT=msgpack
+    msgpack = None
+
+# PUT is deliberately absent: device data PUTs append (see module docstring)
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "DELETE"])
+ALL_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "POST", "PATCH", "DELETE"])
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# on_timing(method, url, status_code, elapsed_seconds)
+TimingHook = Callable[[str, str, int, float], None]
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.environ.get(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() not in ("0", "false", "no", "off", "")
+
+
+class _Retry(Retry):
+    """Retry that repeats any method on 429: a throttled request was never processed."""
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429 and self.total:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class ApiSession(requests.Session):
+    """requests.Session with a base URL, default timeout and pooled, retrying adapters."""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: float = 10.0,
+        pool_size: int = 10,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        gzip: bool = True,
+        retry_methods: Iterable[str] = IDEMPOTENT_METHODS,
+        on_timing: Optional[TimingHook] = None,
+    ):
+        super().__init__()
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.timeout = timeout
+
+        def make_adapter(methods: Iterable[str]) -> HTTPAdapter:
+            retry = _Retry(
+                total=retries,
+                connect=retries,
+                read=retries,
+                status=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset(m.upper() for m in methods),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            return HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        adapter = make_adapter(retry_methods)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+        # Used instead of the mounted adapter for calls made with retry=True
+        self._retry_all_adapter = make_adapter(ALL_METHODS)
+        self._local = threading.local()
+
+        self.headers["Accept-Encoding"] = "gzip, deflate" if gzip else "identity"
+        self.headers["Connection"] = "keep-alive"
+        if api_key:
+            self.headers["x-api-key"] = api_key
+
+        if on_timing:
+            def _timing(r, *args, **kwargs):
+                on_timing(r.request.method, r.url, r.status_code, r.elapsed.total_seconds())
+            self.hooks["response"].append(_timing)
+
+    def url(self, path: str) -> str:
+        """Resolve a path against base_url; absolute URLs are returned unchanged."""
+        if path.startswith(("http://", "https://")) or not self.base_url:
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method, url, *args, retry: bool = False, **kwargs):  # type: ignore[override]
+        """retry=True: also retry this call on read errors / 5xx although its method is not idempotent."""
+        kwargs.setdefault("timeout", self.timeout)
+        self._local.retry_all = retry
+        try:
+            return super().request(method, self.url(url), *args, **kwargs)
+        finally:
+            self._local.retry_all = False
+
+    def get_adapter(self, url):  # type: ignore[override]
+        if getattr(self._local, "retry_all", False) and url.lower().startswith(("http://", "https://")):
+            return self._retry_all_adapter
+        return super().get_adapter(url)
+
+    def close(self) -> None:
+        super().close()
+        self._retry_all_adapter.close()
+
+
+def create_session(
+    base_url: Optional[str] = None,
+    api_key: Optional[str] = None,
+    on_timing: Optional[TimingHook] = None,
+    **overrides,
+) -> ApiSession:
+    """Build an ApiSession using the HTTP_* env vars as defaults; keyword overrides win."""
+    options = {
+        "timeout": float(os.environ.get("HTTP_TIMEOUT", "10")),
+        "pool_size": int(os.environ.get("HTTP_POOL_SIZE", "10")),
+        "retries": int(os.environ.get("HTTP_RETRIES", "3")),
+        "backoff_factor": float(os.environ.get("HTTP_BACKOFF", "0.5")),
+        "gzip": _env_bool("HTTP_GZIP", True),
+    }
+    options.update(overrides)
+    if api_key is None:
+        api_key = os.environ.get("API_KEY") or None
+    return ApiSession(base_url=base_url, api_key=api_key, on_timing=on_timing, **options)
+
+
+class RequestTimer:
+    """Timing hook that accumulates request count and latency; pass as on_timing. Thread-safe."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, method: str, url: str, status: int, elapsed: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += elapsed
+            self.max = max(self.max, elapsed)
+            if status >= 400:
+                self.errors += 1
+
+    def summary(self) -> str:
+        mean_ms = (self.total / self.count * 1000.0) if self.count else 0.0
+        return f"{self.count} requests, mean {mean_ms:.1f} ms, max {self.max * 1000.0:.1f} ms, {self.errors} HTTP errors"
+
+
+
+class TelemetryEncoder:
+    """Encode readings for PUT /devices/{name}/data; returns (body bytes, headers).
+
+    With units_once, a reading `{channel: {value, units}}` is sent as `{values, units?}` and
+    units are only included for channels whose units the server has not been sent yet. Call
+    forget(device) after a failed send so the next reading carries units again.
+    """
+
+    def __init__(self, wire_format: str = "json", gzip: bool = False, units_once: bool = False):
+        wire_format = wire_format.lower()
+        if wire_format not in ("json", "msgpack"):
+            raise ValueError(f"Unknown wire format '{wire_format}' (json, msgpack)")
+        if wire_format == "msgpack" and msgpack is None:
+            print("This script requires the 'msgpack' package. Install with: pip install msgpack")
+            sys.exit(1)
+        self.wire_format = wire_format
+        self.gzip = gzip
+        self.units_once = units_once
+        self.headers = {"Content-Type": "application/msgpack" if wire_format == "msgpack" else "application/json"}
+        if gzip:
+            self.headers["Content-Encoding"] = "gzip"
+        self._sent_units: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "TelemetryEncoder":
+        return cls(os.environ.get("WIRE_FORMAT", "json"), _env_bool("WIRE_GZIP", False), _env_bool("UNITS_ONCE", False))
+
+    def compact(self, device: str, payload: dict) -> dict:
+        values, units = {}, {}
+        with self._lock:
+            known = self._sent_units.setdefault(device, {})
+            for key, val in payload.items():
+                if key == "timestamp":
+                    continue
+                if isinstance(val, dict) and "value" in val:
+                    values[key] = val["value"]
+                    unit = val.get("units")
+                    if unit is not None and known.get(key) != unit:
+                        units[key] = known[key] = unit
+                else:
+                    values[key] = val
+        out = {"values": values}
+        if units:
+            out["units"] = units
+        if "timestamp" in payload:
+            out["timestamp"] = payload["timestamp"]
+        return out
+
+    def forget(self, device: str) -> None:
+        with self._lock:
+            self._sent_units.pop(device, None)
+
+    def encode(self, device: str, payload: dict) -> Tuple[bytes, Dict[str, str]]:
+        doc = self.compact(device, payload) if self.units_once else payload
+        if self.wire_format == "msgpack":
+            body = msgpack.packb(doc, use_bin_type=True)
+        else:
+            body = json.dumps(doc, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        if self.gzip:
+            body = gzip_codec.compress(body, compresslevel=5)
+        return body, self.headers
@@ -0,0 +1,133 @@
+"""profiling.py
+Opt-in profiling for the Python senders (used by dummy.py).
+
+Switched on with the PROFILE env var, a comma-separated list of:
+  phases       per-phase wall-clock timers around the hot loop (also enabled by PROFILE=1)
+  cprofile     run under cProfile and write <name>-<pid>.pstats on shutdown. cProfile only
+               sees the thread that started it, so callers should keep the work on that
+               thread while it is on (see Profiler.cprofile_enabled)
+  tracemalloc  trace allocations and write the top allocation sites to <name>-<pid>.alloc.txt
+  all          everything above
+
+Output files go to PROFILE_DIR (default: current directory). Inspect a .pstats file with:
+  python -m pstats dummy-1234.pstats   (then e.g. `sort cumtime` / `stats 30`)
+
+Example:
+  PROFILE=phases python dummy.py
+  PROFILE=all PROFILE_DIR=/tmp/prof python dummy.py
+"""
+from __future__ import annotations
+import cProfile
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+_NULL = nullcontext()
+
+
+class PhaseStats:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class Profiler:
+    """Per-phase timers plus optional cProfile and tracemalloc, all off unless enabled."""
+
+    def __init__(self, name: str, phases: bool = False, cprofile: bool = False, trace_malloc: bool = False,
+                 out_dir: str = ".", top: int = 25):
+        self.name = name
+        self.phases_enabled = phases
+        self.out_dir = out_dir
+        self.top = top
+        self.phases: Dict[str, PhaseStats] = {}
+        self._cprofile: Optional[cProfile.Profile] = cProfile.Profile() if cprofile else None
+        self._trace_malloc = trace_malloc
+        self._started = 0.0
+        self._lock = threading.Lock()  # phases may be timed from sender worker threads
+
+    @classmethod
+    def from_env(cls, name: str, env: str = "PROFILE") -> "Profiler":
+        raw = {p.strip().lower() for p in os.environ.get(env, "").split(",") if p.strip()}
+        full = "all" in raw
+        return cls(
+            name,
+            phases=full or bool(raw & {"1", "true", "phases"}),
+            cprofile=full or "cprofile" in raw,
+            trace_malloc=full or "tracemalloc" in raw,
+            out_dir=os.environ.get("PROFILE_DIR", "."),
+        )
+
+    @property
+    def cprofile_enabled(self) -> bool:
+        return self._cprofile is not None
+
+    @property
+    def enabled(self) -> bool:
+        return self.phases_enabled or self._cprofile is not None or self._trace_malloc
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        if self._trace_malloc:
+            tracemalloc.start(10)
+        if self._cprofile:
+            self._cprofile.enable()
+
+    def phase(self, name: str):
+        """Context manager timing one phase; a shared no-op when phases are off."""
+        if not self.phases_enabled:
+            return _NULL
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                st = self.phases.get(name)
+                if st is None:
+                    st = self.phases[name] = PhaseStats()
+                st.count += 1
+                st.total += elapsed
+                if elapsed > st.max:
+                    st.max = elapsed
+
+    def stop(self) -> List[str]:
+        """Stop collectors, write output files and return summary lines for logging."""
+        lines: List[str] = []
+        wall = time.perf_counter() - self._started if self._started else 0.0
+        if self._cprofile:
+            self._cprofile.disable()
+        if self.phases:
+            # Phases run on several threads, so their summed time (and share) can exceed the wall clock
+            lines.append(f"Phase timings over {wall:.1f}s wall clock (% = thread time / wall, summed over threads):")
+            for name, st in sorted(self.phases.items(), key=lambda kv: -kv[1].total):
+                share = (st.total / wall * 100.0) if wall else 0.0
+                lines.append(f"  {name:<10} n={st.count:<8} total={st.total:8.2f}s ({share:5.1f}%) "
+                             f"mean={st.total / st.count * 1000.0:8.2f}ms max={st.max * 1000.0:8.2f}ms")
+        if not (self._cprofile or self._trace_malloc):
+            return lines
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, f"{self.name}-{os.getpid()}")
+        if self._cprofile:
+            self._cprofile.dump_stats(f"{base}.pstats")
+            lines.append(f"cProfile stats written to {base}.pstats")
+        if self._trace_malloc:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(f"{base}.alloc.txt", "w", encoding="utf-8") as f:
+                f.write(f"traced current={current / 1024:.1f} KiB peak={peak / 1024:.1f} KiB\n")
+                for stat in snapshot.statistics("lineno")[: self.top]:
+                    f.write(f"{stat}\n")
+            lines.append(f"Top {self.top} allocation sites written to {base}.alloc.txt (peak {peak / 1024:.1f} KiB)")
+        return lines
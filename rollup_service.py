@@ -0,0 +1,407 @@
+"""rollup_service.py
+Incremental rollup engine for device telemetry (1-minute and 1-hour min/max/mean).
+
+Instead of re-fetching raw history and aggregating client-side for every chart, this service
+tails new readings and keeps per-device, per-channel aggregates in NumPy ring buffers:
+
+  1m  buckets, default capacity 10080 (7 days)
+  1h  buckets, default capacity 8760  (1 year)
+
+Sources (--source):
+  poll  (default) GET /devices/{name}/history with a per-device `from` watermark. When a page
+        hits the API's 10,000-row limit the older remainder is fetched before moving on.
+        Each poll re-reads the last --lag-seconds below the watermark so readings that are
+        stored late or with a past client timestamp are still picked up; readings already
+        aggregated in that window are recognised by (timestamp, content hash) and skipped.
+  sse   GET /stream/events 'external-latest' batches (mapped external tables only).
+
+Numeric channels are aggregated; `{value, units}` objects contribute their value, anything
+non-numeric is ignored. Buckets older than the ring capacity are dropped.
+
+Served over HTTP (--port, default 8091):
+  GET /health
+  GET /rollups                                    devices and their channels
+  GET /rollups/{device}/{channel}?res=1m|1h&from=<ms>&to=<ms>
+      -> {"device", "channel", "res", "points": [{"t", "count", "min", "max", "mean"}, ...]}
+
+State (buffers, watermarks and the lag-window dedupe keys) is saved with numpy.savez_compressed to --state every
+--persist-every seconds and on shutdown, and reloaded on start.
+
+Example run:
+  python rollup_service.py --api-base http://localhost:5000/api --interval 10
+  curl "http://localhost:8091/rollups/node_5.03/humidity?res=1h"
+
+Requires: pip install requests numpy
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlparse
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:
+    print("This script requires the 'numpy' package. Install with: pip install numpy")
+    sys.exit(1)
+
+from http_client import ApiSession, create_session
+
+RESOLUTIONS = {"1m": 60_000, "1h": 3_600_000}
+HISTORY_PAGE_LIMIT = 10000  # matches getHistoricalData in routers/devices.js
+
+
+class RollupRing:
+    """Fixed-capacity ring of time buckets holding count/sum/min/max for one channel."""
+
+    def __init__(self, res_ms: int, capacity: int):
+        self.res_ms = res_ms
+        self.capacity = capacity
+        self.start = np.full(capacity, -1, dtype=np.int64)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.total = np.zeros(capacity, dtype=np.float64)
+        self.min = np.full(capacity, np.inf, dtype=np.float64)
+        self.max = np.full(capacity, -np.inf, dtype=np.float64)
+
+    def update(self, ts: np.ndarray, values: np.ndarray) -> None:
+        if not len(ts):
+            return
+        buckets = (ts // self.res_ms) * self.res_ms
+        # Within one batch only the newest `capacity` buckets can coexist in the ring
+        horizon = max(int(buckets.max()), int(self.start.max())) - (self.capacity - 1) * self.res_ms
+        keep = buckets >= horizon
+        buckets, values = buckets[keep], values[keep]
+        if not len(buckets):
+            return
+        idx = (buckets // self.res_ms) % self.capacity
+
+        current = self.start[idx]
+        stale = current < buckets
+        if stale.any():
+            reset = np.unique(idx[stale])
+            self.start[reset] = -1
+            self.count[reset] = 0
+            self.total[reset] = 0.0
+            self.min[reset] = np.inf
+            self.max[reset] = -np.inf
+            # Assign the slot to the newest bucket mapped onto it in this batch
+            order = np.argsort(buckets[stale])
+            self.start[idx[stale][order]] = buckets[stale][order]
+
+        live = self.start[idx] == buckets
+        idx, values = idx[live], values[live]
+        np.add.at(self.count, idx, 1)
+        np.add.at(self.total, idx, values)
+        np.minimum.at(self.min, idx, values)
+        np.maximum.at(self.max, idx, values)
+
+    def points(self, start: Optional[int] = None, end: Optional[int] = None) -> List[dict]:
+        mask = self.count > 0
+        if start is not None:
+            mask &= self.start >= start
+        if end is not None:
+            mask &= self.start <= end
+        sel = np.nonzero(mask)[0]
+        sel = sel[np.argsort(self.start[sel])]
+        return [
+            {
+                "t": int(self.start[i]),
+                "count": int(self.count[i]),
+                "min": float(self.min[i]),
+                "max": float(self.max[i]),
+                "mean": float(self.total[i] / self.count[i]),
+            }
+            for i in sel
+        ]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"start": self.start, "count": self.count, "total": self.total, "min": self.min, "max": self.max}
+
+    def load(self, arrays: Dict[str, np.ndarray]) -> None:
+        if len(arrays["start"]) != self.capacity:
+            return  # capacity changed between runs; start fresh
+        self.start, self.count, self.total = arrays["start"], arrays["count"], arrays["total"]
+        self.min, self.max = arrays["min"], arrays["max"]
+
+
+def reading_key(ts: int, entry: dict) -> str:
+    digest = hashlib.blake2b(json.dumps(entry, sort_keys=True, default=str).encode("utf-8"), digest_size=8)
+    return f"{ts}:{digest.hexdigest()}"
+
+
+class RollupStore:
+    """All rings keyed by (device, channel, resolution) plus per-device watermarks.
+
+    Readings within lag_ms of a device's watermark are remembered by key so the poller can
+    re-read that window without counting them twice.
+    """
+
+    def __init__(self, capacities: Dict[str, int], lag_ms: int = 0):
+        self.capacities = capacities
+        self.lag_ms = lag_ms
+        self.rings: Dict[Tuple[str, str, str], RollupRing] = {}
+        self.watermarks: Dict[str, int] = {}
+        self.recent: Dict[str, Dict[str, int]] = {}  # device -> reading key -> timestamp
+        self.lock = threading.Lock()
+
+    def _ring(self, device: str, channel: str, res: str) -> RollupRing:
+        key = (device, channel, res)
+        ring = self.rings.get(key)
+        if ring is None:
+            ring = self.rings[key] = RollupRing(RESOLUTIONS[res], self.capacities[res])
+        return ring
+
+    def poll_from(self, device: str, default: int) -> int:
+        """Lower bound (exclusive) for the next history poll of a device."""
+        mark = self.watermarks.get(device)
+        return default if mark is None else mark - self.lag_ms
+
+    def ingest(self, device: str, readings: Iterable[dict]) -> int:
+        """Aggregate readings ({timestamp, channel: value | {value, units}}) for one device."""
+        batch = []
+        for entry in readings:
+            ts = entry.get("timestamp")
+            if ts is not None:
+                batch.append((int(ts), entry))
+        keys = [reading_key(ts, entry) for ts, entry in batch]
+        with self.lock:
+            seen = self.recent.setdefault(device, {})
+            fresh = []
+            for key, (ts, entry) in zip(keys, batch):
+                if key not in seen:
+                    seen[key] = ts
+                    fresh.append((ts, entry))
+        if not fresh:
+            return 0
+
+        per_channel: Dict[str, Tuple[List[int], List[float]]] = {}
+        newest = self.watermarks.get(device, 0)
+        for ts, entry in fresh:
+            newest = max(newest, ts)
+            for channel, raw in entry.items():
+                if channel == "timestamp":
+                    continue
+                if isinstance(raw, dict):
+                    raw = raw.get("value")
+                if isinstance(raw, bool) or not isinstance(raw, (int, float)):
+                    continue
+                tss, vals = per_channel.setdefault(channel, ([], []))
+                tss.append(ts)
+                vals.append(float(raw))
+        with self.lock:
+            for channel, (tss, vals) in per_channel.items():
+                ts_arr = np.asarray(tss, dtype=np.int64)
+                val_arr = np.asarray(vals, dtype=np.float64)
+                for res in RESOLUTIONS:
+                    self._ring(device, channel, res).update(ts_arr, val_arr)
+            self.watermarks[device] = newest
+            cutoff = newest - self.lag_ms
+            for key in [k for k, t in seen.items() if t <= cutoff]:
+                del seen[key]
+        return len(fresh)
+
+    def catalog(self) -> Dict[str, List[str]]:
+        with self.lock:
+            out: Dict[str, set] = {}
+            for device, channel, _res in self.rings:
+                out.setdefault(device, set()).add(channel)
+        return {d: sorted(c) for d, c in sorted(out.items())}
+
+    def query(self, device: str, channel: str, res: str, start: Optional[int], end: Optional[int]) -> Optional[List[dict]]:
+        with self.lock:
+            ring = self.rings.get((device, channel, res))
+            return ring.points(start, end) if ring else None
+
+    def save(self, path: str) -> None:
+        with self.lock:
+            arrays = {}
+            keys = []
+            for i, (key, ring) in enumerate(self.rings.items()):
+                keys.append(list(key))
+                for name, arr in ring.arrays().items():
+                    # Copy under the lock: ingest keeps updating the live arrays while we compress
+                    arrays[f"r{i}_{name}"] = arr.copy()
+            meta = json.dumps({"keys": keys, "watermarks": self.watermarks, "recent": self.recent})
+        tmp = f"{path}.tmp.npz"
+        np.savez_compressed(tmp, meta=np.array(meta), **arrays)
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> None:
+        if not os.path.exists(path):
+            return
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            with self.lock:
+                self.watermarks = {k: int(v) for k, v in meta["watermarks"].items()}
+                self.recent = {d: {k: int(t) for k, t in seen.items()} for d, seen in meta.get("recent", {}).items()}
+                for i, (device, channel, res) in enumerate(meta["keys"]):
+                    if res not in RESOLUTIONS:
+                        continue
+                    names = ("start", "count", "total", "min", "max")
+                    self._ring(device, channel, res).load({n: data[f"r{i}_{n}"].copy() for n in names})
+        print(f"[rollup] Restored {len(meta['keys'])} rings for {len(self.watermarks)} devices from {path}")
+
+
+def fetch_new_history(session: ApiSession, device: str, since: int, now: int) -> List[dict]:
+    """All readings with since < timestamp <= now, paging down when the API limit is hit."""
+    rows: List[dict] = []
+    upper = now
+    while upper > since:
+        r = session.get(f"devices/{device}/history", params={"from": since + 1, "to": upper})
+        r.raise_for_status()
+        page = r.json() or []
+        rows.extend(page)
+        if len(page) < HISTORY_PAGE_LIMIT:
+            break
+        upper = min(int(e["timestamp"]) for e in page) - 1
+    return rows
+
+
+def run_poller(session: ApiSession, store: RollupStore, interval: float, stop: threading.Event,
+               devices: Optional[List[str]], backfill_ms: int) -> None:
+    while not stop.is_set():
+        try:
+            names = devices
+            if not names:
+                r = session.get("devices")
+                r.raise_for_status()
+                names = [d["name"] for d in r.json() if d.get("name")]
+            now = int(time.time() * 1000)
+            for name in names:
+                if stop.is_set():
+                    break
+                since = store.poll_from(name, now - backfill_ms)
+                try:
+                    n = store.ingest(name, fetch_new_history(session, name, since, now))
+                except Exception as e:
+                    print(f"[rollup] {name}: poll failed: {e}", file=sys.stderr)
+                    continue
+                if n:
+                    print(f"[rollup] {name}: +{n} readings", flush=True)
+        except Exception as e:
+            print(f"[rollup] Device listing failed: {e}", file=sys.stderr)
+        stop.wait(interval)
+
+
+def run_sse(session: ApiSession, store: RollupStore, stop: threading.Event) -> None:
+    while not stop.is_set():
+        try:
+            with session.get("stream/events", stream=True, timeout=(5, None)) as r:
+                event = None
+                for raw in r.iter_lines(decode_unicode=True):
+                    if stop.is_set():
+                        return
+                    if not raw:
+                        event = None
+                    elif raw.startswith("event:"):
+                        event = raw[6:].strip()
+                    elif raw.startswith("data:") and event == "latest":
+                        msg = json.loads(raw[5:])
+                        for device, entry in (msg.get("data") or {}).items():
+                            ts = entry.get("timestamp")
+                            if ts is None or int(ts) <= store.watermarks.get(device, 0):
+                                continue
+                            store.ingest(device, [{"timestamp": ts, **(entry.get("values") or {})}])
+        except Exception as e:
+            if not stop.is_set():
+                print(f"[rollup] SSE reconnecting after error: {e}", file=sys.stderr)
+                stop.wait(2.0)
+
+
+def make_handler(store: RollupStore):
+    class Handler(BaseHTTPRequestHandler):
+        def _json(self, status: int, body) -> None:
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+            if parts == ["health"]:
+                return self._json(200, {"status": "ok", "rings": len(store.rings)})
+            if parts == ["rollups"]:
+                return self._json(200, store.catalog())
+            if len(parts) == 3 and parts[0] == "rollups":
+                q = parse_qs(url.query)
+                res = q.get("res", ["1m"])[0]
+                if res not in RESOLUTIONS:
+                    return self._json(400, {"error": f"res must be one of {', '.join(RESOLUTIONS)}"})
+                try:
+                    start = int(q["from"][0]) if "from" in q else None
+                    end = int(q["to"][0]) if "to" in q else None
+                except ValueError:
+                    return self._json(400, {"error": "from and to must be integer epoch milliseconds"})
+                points = store.query(parts[1], parts[2], res, start, end)
+                if points is None:
+                    return self._json(404, {"error": "Unknown device/channel"})
+                return self._json(200, {"device": parts[1], "channel": parts[2], "res": res, "points": points})
+            return self._json(404, {"error": "Not found"})
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Incremental 1m/1h rollups for device telemetry")
+    parser.add_argument("--api-base", default=os.environ.get("API_BASE", "http://localhost:5000/api"))
+    parser.add_argument("--source", choices=["poll", "sse"], default="poll")
+    parser.add_argument("--devices", default=None, help="Comma-separated devices (poll mode; default: all)")
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between poll rounds")
+    parser.add_argument("--backfill-hours", type=float, default=24.0, help="History to load for devices without a watermark")
+    parser.add_argument("--lag-seconds", type=float, default=300.0,
+                        help="Window below the watermark re-read on every poll for late or backfilled readings")
+    parser.add_argument("--cap-1m", type=int, default=10080)
+    parser.add_argument("--cap-1h", type=int, default=8760)
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", "8091")))
+    parser.add_argument("--state", default="rollups.npz")
+    parser.add_argument("--persist-every", type=float, default=60.0)
+    args = parser.parse_args()
+
+    store = RollupStore({"1m": args.cap_1m, "1h": args.cap_1h}, lag_ms=int(args.lag_seconds * 1000))
+    store.load(args.state)
+    stop = threading.Event()
+
+    def handle_sig(signum, frame):
+        stop.set()
+
+    signal.signal(signal.SIGINT, handle_sig)
+    signal.signal(signal.SIGTERM, handle_sig)
+
+    session = create_session(args.api_base, timeout=60)
+    if args.source == "poll":
+        devices = args.devices.split(",") if args.devices else None
+        worker = threading.Thread(target=run_poller, daemon=True, args=(
+            session, store, args.interval, stop, devices, int(args.backfill_hours * 3_600_000)))
+    else:
+        worker = threading.Thread(target=run_sse, daemon=True, args=(session, store, stop))
+    worker.start()
+
+    httpd = ThreadingHTTPServer(("0.0.0.0", args.port), make_handler(store))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    print(f"[rollup] Source={args.source}, serving rollups on port {args.port}")
+
+    try:
+        while not stop.wait(args.persist_every):
+            store.save(args.state)
+    finally:
+        httpd.shutdown()
+        store.save(args.state)
+        print(f"[rollup] State saved to {args.state}. Shutdown complete.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
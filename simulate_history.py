@@ -0,0 +1,224 @@
+"""simulate_history.py
+Time-accelerated simulation: generate realistic past readings for a set of devices and push
+them through the normal ingest path (PUT /devices/{name}/data) with explicit timestamps.
+
+Features:
+- Virtual clock from --from to --to (default: now) in --step increments, run at any --speedup
+  (1 = wall-clock pace, 3600 = one simulated hour per second, 0 = as fast as the API accepts)
+- Per-channel models instead of uniform noise: a diurnal shape (daylight, weekday occupancy or
+  night-peaking) plus a mean-reverting random walk, with a fixed per-device offset so rooms differ
+- Same channels and units as dummy.py, so the visualiser treats simulated and live data alike
+- Readings carry `timestamp` (epoch ms); the API stores it instead of the receive time
+- Concurrent sends over one pooled session (see http_client.py), bounded in flight
+- Deterministic with --seed
+
+Example run:
+  python simulate_history.py --from 2025-09-01 --to 2025-10-01 --step 300 --speedup 0
+  python simulate_history.py --floor 5 --from 2025-10-01T00:00 --step 60 --speedup 3600 --workers 8
+"""
+from __future__ import annotations
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from http_client import ApiSession, create_session
+from timeparse import parse_time
+
+HOUR_MS = 60 * 60 * 1000
+
+
+def daylight(dt: datetime) -> float:
+    hour = dt.hour + dt.minute / 60.0
+    return max(0.0, math.sin(math.pi * (hour - 6.0) / 14.0)) if 6.0 < hour < 20.0 else 0.0
+
+
+def occupancy(dt: datetime) -> float:
+    """0..1 office occupancy: weekday daytime bell peaking early afternoon."""
+    if dt.weekday() >= 5:
+        return 0.05
+    hour = dt.hour + dt.minute / 60.0
+    if hour < 7 or hour > 20:
+        return 0.0
+    return max(0.0, math.sin(math.pi * (hour - 7) / 13.0))
+
+
+def night(dt: datetime) -> float:
+    hour = dt.hour + dt.minute / 60.0
+    return 0.5 * (1.0 + math.cos(2.0 * math.pi * (hour - 4.0) / 24.0))
+
+
+SHAPES = {"daylight": daylight, "occupancy": occupancy, "night": night, "flat": lambda _dt: 0.0}
+
+
+class ChannelModel:
+    """base + amplitude * shape(t) + Ornstein-Uhlenbeck walk, clamped to [low, high]."""
+
+    def __init__(self, units: str, base: float, amplitude: float, shape: str, sigma: float, reversion: float,
+                 low: float, high: float, decimals: int = 2):
+        self.units = units
+        self.base = base
+        self.amplitude = amplitude
+        self.shape = SHAPES[shape]
+        self.sigma = sigma          # walk std-dev per sqrt(hour)
+        self.reversion = reversion  # pull back towards 0 per hour
+        self.low = low
+        self.high = high
+        self.decimals = decimals
+
+    def value(self, dt: datetime, walk: float, offset: float):
+        v = self.base + offset + self.amplitude * self.shape(dt) + walk
+        v = min(self.high, max(self.low, v))
+        return int(round(v)) if self.decimals == 0 else round(v, self.decimals)
+
+
+# Channels and units match dummy.generate_sensor_data()
+CHANNELS: Dict[str, ChannelModel] = {
+    "uv_light": ChannelModel("UV Index", 0.0, 0.9, "daylight", 0.05, 2.0, 0.0, 1.0),
+    "loudness": ChannelModel("dB", 34.0, 30.0, "occupancy", 3.0, 1.5, 30.0, 80.0, 1),
+    "pm1.0atmospheric": ChannelModel("µg/m³", 1.2, 1.2, "occupancy", 0.2, 0.5, 1.0, 3.0, 1),
+    "pm2.5atmospheric": ChannelModel("µg/m³", 2.3, 2.0, "occupancy", 0.3, 0.5, 2.0, 5.0, 1),
+    "visible_light": ChannelModel("Lux", 210.0, 330.0, "daylight", 25.0, 1.0, 200.0, 600.0, 0),
+    "ir_light": ChannelModel("Lux", 205.0, 300.0, "daylight", 20.0, 1.0, 200.0, 600.0, 0),
+    "mq5_sensor_voltage": ChannelModel("Volts", 0.62, 0.15, "occupancy", 0.03, 0.3, 0.5, 1.0),
+    "humidity": ChannelModel("%", 30.0, 18.0, "night", 2.0, 0.2, 15.0, 60.0),
+    "luminance": ChannelModel("cd/m²", 22.0, 24.0, "daylight", 1.5, 1.0, 20.0, 50.0),
+    "no2": ChannelModel("", 130.0, 120.0, "occupancy", 12.0, 0.5, 100.0, 300.0, 0),
+}
+
+
+class DeviceState:
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.walk = {name: 0.0 for name in CHANNELS}
+        self.offset = {name: rng.gauss(0.0, 0.1 * max(m.amplitude, m.sigma)) for name, m in CHANNELS.items()}
+
+    def reading(self, ts_ms: int, dt_hours: float) -> dict:
+        dt = datetime.fromtimestamp(ts_ms / 1000.0)
+        payload = {}
+        for name, model in CHANNELS.items():
+            w = self.walk[name]
+            w += -model.reversion * w * dt_hours + model.sigma * math.sqrt(dt_hours) * self.rng.gauss(0.0, 1.0)
+            self.walk[name] = w
+            payload[name] = {"value": model.value(dt, w, self.offset[name]), "units": model.units}
+        payload["timestamp"] = ts_ms
+        return payload
+
+
+class VirtualClock:
+    """Maps simulated time onto wall time at a fixed speed-up (0 = no pacing)."""
+
+    def __init__(self, start_ms: int, speedup: float):
+        self.start_ms = start_ms
+        self.speedup = speedup
+        self.wall_start = time.monotonic()
+
+    def wait_until(self, virtual_ms: int, stop: threading.Event) -> None:
+        if self.speedup <= 0:
+            return
+        due = self.wall_start + (virtual_ms - self.start_ms) / 1000.0 / self.speedup
+        delay = due - time.monotonic()
+        if delay > 0:
+            stop.wait(delay)
+
+
+def load_device_names(path: str, floor: Optional[int]) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    devices = data.get("devices", []) if isinstance(data, dict) else data
+    return [d["name"] for d in devices if d.get("name") and (floor is None or d.get("floor") == floor)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate realistic historical readings on a virtual clock")
+    parser.add_argument("--api-base", default=os.getenv("API_BASE", "http://localhost:5000/api"))
+    parser.add_argument("--api-key", default=os.getenv("API_KEY"))
+    parser.add_argument("--devices", default=None, help="Comma-separated device names (default: from --devices-file)")
+    parser.add_argument("--devices-file", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "devices.json"))
+    parser.add_argument("--floor", type=int, default=None, help="Only devices on this floor")
+    parser.add_argument("--from", dest="start", required=True, help="Start (ISO date/datetime or epoch ms)")
+    parser.add_argument("--to", dest="end", default=None, help="End (ISO date/datetime or epoch ms; default: now)")
+    parser.add_argument("--step", type=float, default=300.0, help="Simulated seconds between readings per device")
+    parser.add_argument("--speedup", type=float, default=0.0, help="Simulated seconds per wall second (0 = unpaced)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    start = parse_time(args.start)
+    end = min(parse_time(args.end) if args.end else int(time.time() * 1000), int(time.time() * 1000))
+    step_ms = int(args.step * 1000)
+    if start > end or step_ms <= 0:
+        print("[sim] Need --from <= --to (not in the future) and --step > 0", file=sys.stderr)
+        return 2
+    devices = args.devices.split(",") if args.devices else load_device_names(args.devices_file, args.floor)
+    if not devices:
+        print("[sim] No devices selected", file=sys.stderr)
+        return 2
+
+    rng = random.Random(args.seed)
+    states = {name: DeviceState(random.Random(rng.random())) for name in devices}
+    steps = (end - start) // step_ms + 1
+    print(f"[sim] {len(devices)} devices x {steps} steps of {args.step:g}s = {len(devices) * steps} readings, "
+          f"speedup={'unpaced' if args.speedup <= 0 else f'{args.speedup:g}x'}")
+
+    session: ApiSession = create_session(args.api_base, api_key=args.api_key, pool_size=args.workers)
+    clock = VirtualClock(start, args.speedup)
+    stop = threading.Event()
+    in_flight = threading.BoundedSemaphore(args.workers * 4)
+    lock = threading.Lock()
+    counts = {"sent": 0, "failed": 0}
+
+    def send(name: str, payload: dict) -> None:
+        try:
+            r = session.put(f"devices/{name}/data", json=payload)
+            r.raise_for_status()
+            ok = True
+        except Exception as e:
+            ok = False
+            print(f"[sim] {name} @ {payload['timestamp']}: {e}", file=sys.stderr)
+        finally:
+            in_flight.release()
+        with lock:
+            counts["sent" if ok else "failed"] += 1
+
+    wall_start = time.monotonic()
+    last_report = wall_start
+    dt_hours = step_ms / HOUR_MS
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            ts = start
+            while ts <= end and not stop.is_set():
+                clock.wait_until(ts, stop)
+                for name in devices:
+                    payload = states[name].reading(ts, dt_hours)
+                    in_flight.acquire()
+                    pool.submit(send, name, payload)
+                now = time.monotonic()
+                if now - last_report >= 5.0:
+                    last_report = now
+                    with lock:
+                        done = counts["sent"] + counts["failed"]
+                    print(f"[sim] virtual {datetime.fromtimestamp(ts / 1000.0):%Y-%m-%d %H:%M} "
+                          f"{done} readings ({done / (now - wall_start):.0f}/s), {counts['failed']} failed")
+                ts += step_ms
+    except KeyboardInterrupt:
+        stop.set()
+        print("\n[sim] Interrupted; waiting for in-flight sends.")
+    finally:
+        session.close()
+
+    elapsed = time.monotonic() - wall_start
+    print(f"[sim] Sent {counts['sent']} readings ({counts['failed']} failed) in {elapsed:.1f}s "
+          f"({counts['sent'] / elapsed if elapsed else 0:.0f}/s)")
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,592 @@
+"""standin_server.py
+Lightweight stand-in for the API, for offline benchmarking of the Python tools.
+
+Serves just enough of the real API for dummy.py, demo.py, freshness_probe.py and
+verify_survey_flow.py to run on a laptop with no database, visualiser or docker-compose stack:
+
+  GET  /health, /api/health
+  GET  /api/devices                     POST /api/devices
+  GET  /api/devices/{name}              GET  /api/devices/{name}/data
+  PUT  /api/devices/{name}/data         GET  /api/devices/{name}/history?from&to
+  GET  /api/latest
+  POST /api/survey/register | login | logout | question | history
+  GET  /api/survey/auth/status | admin/questions | admin/history | admin/history/export | admin/stats
+  GET  /__standin/stats                 (request / throttle / injected-error counters)
+
+Everything is held in memory. Responses mirror the real routes' status codes and JSON shapes.
+
+Features:
+- asyncio HTTP/1.1 server with keep-alive; no third-party packages
+- Latency distributions per request (default) or per path prefix (--route-latency):
+    fixed:MS  uniform:LO,HI  normal:MEAN,SD  lognormal:MEDIAN,SIGMA  exp:MEAN   (all in ms)
+- Fault injection: --error-rate returns one of --error-statuses instead of the real response
+- Throttling: token bucket (--rate requests/s, --burst) answering 429 with Retry-After
+- gzip/deflate request bodies are inflated like express.json(); device data also accepts
+  application/msgpack (if the 'msgpack' package is installed, else 415) and the compact
+  units-once schema {values, units?, timestamp?}
+
+Example run:
+  python standin_server.py --port 5000 --latency lognormal:8,0.6 --error-rate 0.01
+  python standin_server.py --route-latency /api/devices=exp:20 --rate 200 --burst 50
+  API_BASE=http://localhost:5000/api INTERVAL_SECONDS=1 python dummy.py
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import os
+import random
+import secrets
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+from http import HTTPStatus
+from operator import itemgetter
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+try:
+    import msgpack  # type: ignore
+except ImportError:  # optional, like @msgpack/msgpack in the API
+    msgpack = None
+
+from timeparse import parse_epoch_ms
+
+MAX_HEADER_BYTES = 64 * 1024
+msgpack_errors = (msgpack.UnpackException,) if msgpack is not None else ()
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Return a sampler of delays in seconds from a 'kind:a,b' spec in milliseconds."""
+    kind, _, raw = spec.partition(":")
+    args = [float(a) for a in raw.split(",") if a.strip()] if raw else []
+    kind = kind.strip().lower()
+
+    def need(n: int) -> None:
+        if len(args) != n:
+            raise ValueError(f"latency '{spec}': {kind} takes {n} parameter(s)")
+
+    if kind in ("", "none", "0"):
+        return lambda: 0.0
+    if kind == "fixed":
+        need(1)
+        return lambda: args[0] / 1000.0
+    if kind == "uniform":
+        need(2)
+        return lambda: random.uniform(args[0], args[1]) / 1000.0
+    if kind == "normal":
+        need(2)
+        return lambda: max(0.0, random.gauss(args[0], args[1])) / 1000.0
+    if kind == "lognormal":
+        need(2)
+        mu = math.log(max(args[0], 1e-9))
+        return lambda: random.lognormvariate(mu, args[1]) / 1000.0
+    if kind == "exp":
+        need(1)
+        return lambda: random.expovariate(1.0 / args[0]) / 1000.0 if args[0] > 0 else 0.0
+    raise ValueError(f"Unknown latency distribution '{kind}' (fixed, uniform, normal, lognormal, exp)")
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = max(1.0, burst)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Consume one token; return 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class Request:
+    __slots__ = ("method", "path", "query", "headers", "body", "cookies")
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = unquote(parts.path).rstrip("/") or "/"
+        self.query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+        self.cookies = {}
+        for item in headers.get("cookie", "").split(";"):
+            key, sep, val = item.strip().partition("=")
+            if sep:
+                self.cookies[key] = val
+
+    def json(self):
+        if not self.body:
+            return {}
+        return json.loads(self.body.decode("utf-8"))
+
+
+Response = Tuple[int, object, Dict[str, str]]
+
+
+class RawBody:
+    """Pre-encoded response body with its own content type (anything else is sent as JSON)."""
+    __slots__ = ("data", "content_type")
+
+    def __init__(self, data: bytes, content_type: str):
+        self.data = data
+        self.content_type = content_type
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def client_timestamp(raw) -> Optional[int]:
+    """Reading timestamp as the API resolves it: epoch ms or ISO 8601, else the receive time."""
+    now = int(time.time() * 1000)
+    if raw is None or raw == "":
+        return now
+    ms = parse_epoch_ms(raw)
+    return None if ms is None or ms > now + 5 * 60 * 1000 else ms
+
+
+class StandinApi:
+    """In-memory state and route handlers. Handlers return (status, json body, extra headers)."""
+
+    def __init__(self, devices: List[dict], auto_create: bool, history_limit: int):
+        self.devices: Dict[str, dict] = {d["name"]: d for d in devices}
+        self.auto_create = auto_create
+        self.history_limit = history_limit
+        self.history: Dict[str, List[dict]] = {}
+        self.users: Dict[str, dict] = {}
+        self.tokens: Dict[str, str] = {}
+        self.questions: List[dict] = []
+        self.chat_history: Dict[str, dict] = {}
+        self.units: Dict[str, Dict[str, str]] = {}  # device -> channel -> units (units-once schema)
+        self.started = time.time()
+
+    # --- routing -------------------------------------------------------------
+    def dispatch(self, req: Request) -> Response:
+        path, method = req.path, req.method
+        if path in ("/health", "/api/health"):
+            return 200, {"status": "ok", "db": {"engine": "standin", "status": "ok"}}, {}
+        if not path.startswith("/api/"):
+            return 404, {"error": "Not found"}, {}
+        parts = path[len("/api/"):].split("/")
+        if parts[0] == "devices":
+            return self.devices_route(req, parts[1:])
+        if parts == ["latest"] and method == "GET":
+            return 200, self.latest(), {}
+        if parts[0] == "survey":
+            return self.survey_route(req, "/".join(parts[1:]))
+        return 404, {"error": "Not found"}, {}
+
+    # --- devices -------------------------------------------------------------
+    def devices_route(self, req: Request, rest: List[str]) -> Response:
+        if not rest:
+            if req.method == "GET":
+                return 200, list(self.devices.values()), {}
+            if req.method == "POST":
+                return self.create_device(req.json())
+            return 405, {"error": "Method not allowed"}, {}
+        name = rest[0]
+        device = self.devices.get(name)
+        if device is None and self.auto_create and req.method == "PUT":
+            device = self.devices[name] = {"name": name, "type": "standin", "floor": 0,
+                                           "position": {"x": 0, "y": 0, "z": 0}, "pinned": False}
+        if device is None:
+            return 404, {"error": "Device not found"}, {}
+        sub = rest[1:]
+        if not sub and req.method == "GET":
+            return 200, device, {}
+        if sub == ["data"] and req.method == "PUT":
+            if "msgpack" in req.headers.get("content-type", ""):
+                if msgpack is None:
+                    return 415, {"error": "application/msgpack is not supported by this deployment"}, {}
+                data = msgpack.unpackb(req.body, raw=False) if req.body else {}
+            else:
+                data = req.json()
+            if not isinstance(data, dict):
+                return 400, {"error": "Invalid payload"}, {}
+            if isinstance(data.get("values"), dict) and set(data) <= {"values", "units", "timestamp"}:
+                units = data.get("units", {})
+                if not isinstance(units, dict) or not all(isinstance(u, str) for u in units.values()):
+                    return 400, {"error": "units must be an object mapping channel names to unit strings"}, {}
+                data = self.expand_compact(name, data)
+            ts = client_timestamp(data.get("timestamp"))
+            if ts is None:
+                return 400, {"error": "Invalid timestamp (expected epoch milliseconds or ISO 8601)"}, {}
+            data["timestamp"] = ts
+            # Rows stay in timestamp order (client timestamps can arrive out of order), so the
+            # newest reading is rows[-1] and trimming drops the oldest by timestamp
+            rows = self.history.setdefault(name, [])
+            bisect.insort(rows, data, key=itemgetter("timestamp"))
+            if len(rows) > self.history_limit:
+                del rows[: len(rows) - self.history_limit]
+            return 202, None, {}
+        if sub == ["data"] and req.method == "GET":
+            rows = self.history.get(name)
+            return 200, rows[-1] if rows else {}, {}
+        if sub == ["history"] and req.method == "GET":
+            start = int(req.query.get("from") or 0)
+            end = int(req.query.get("to") or time.time() * 1000)
+            rows = [r for r in self.history.get(name, []) if start <= r["timestamp"] <= end]
+            return 200, rows[::-1][:10000], {}
+        return 405, {"error": "Method not allowed"}, {}
+
+    def expand_compact(self, name: str, body: dict) -> dict:
+        units = self.units.setdefault(name, {})
+        units.update(body.get("units", {}))
+        data = {k: ({"value": v, "units": units[k]} if k in units else v) for k, v in body["values"].items()}
+        if "timestamp" in body:
+            data["timestamp"] = body["timestamp"]
+        return data
+
+    def create_device(self, payload) -> Response:
+        if not isinstance(payload, dict) or not isinstance(payload.get("name"), str) or not payload["name"]:
+            return 400, {"error": "Missing or invalid name"}, {}
+        if payload.get("floor") is None:
+            return 400, {"error": "Missing or invalid floor"}, {}
+        pos = payload.get("position")
+        if not isinstance(pos, dict) or any(not isinstance(pos.get(k), (int, float)) for k in "xyz"):
+            return 400, {"error": "Invalid position"}, {}
+        if payload["name"] in self.devices:
+            return 409, {"error": "Device name already exists"}, {}
+        doc = {"name": payload["name"], "type": payload.get("type"), "floor": float(payload["floor"]),
+               "position": {k: float(pos[k]) for k in "xyz"}, "pinned": bool(payload.get("pinned", False))}
+        self.devices[doc["name"]] = doc
+        return 201, doc, {}
+
+    def latest(self) -> dict:
+        out = {}
+        for name, rows in self.history.items():
+            if not rows:
+                continue
+            last = rows[-1]
+            values = {k: (v.get("value") if isinstance(v, dict) else v) for k, v in last.items() if k != "timestamp"}
+            out[name] = {"timestamp": last["timestamp"], "values": values, "primary": None, "mappingId": None,
+                         "range_min": None, "range_max": None, "color_min": None, "color_max": None}
+        return out
+
+    # --- survey --------------------------------------------------------------
+    def auth_cookie(self, username: str) -> Dict[str, str]:
+        token = secrets.token_hex(16)
+        self.tokens[token] = username
+        return {"Set-Cookie": f"authToken={token}; Max-Age=604800; Path=/; HttpOnly; SameSite=Lax"}
+
+    def survey_route(self, req: Request, sub: str) -> Response:
+        handler = {
+            ("POST", "register"): self.register,
+            ("POST", "login"): self.login,
+            ("POST", "logout"): lambda r: (200, {"success": True, "message": "Logged out successfully"},
+                                           {"Set-Cookie": "authToken=; Max-Age=0; Path=/"}),
+            ("GET", "auth/status"): self.auth_status,
+            ("POST", "question"): self.question,
+            ("POST", "history"): self.save_history,
+            ("GET", "admin/questions"): self.admin_questions,
+            ("GET", "admin/history"): lambda r: (200, {"count": len(self.chat_history),
+                                                       "histories": list(self.chat_history.values())}, {}),
+            ("GET", "admin/stats"): self.admin_stats,
+            ("GET", "admin/history/export"): self.export_history,
+        }.get((req.method, sub))
+        if handler is None:
+            return 404, {"error": "Not found"}, {}
+        return handler(req)
+
+    def register(self, req: Request) -> Response:
+        body = req.json()
+        username = str(body.get("username") or "")
+        if not username:
+            return 400, {"error": "Username is required"}, {}
+        if len(username) < 3:
+            return 400, {"error": "Username must be at least 3 characters"}, {}
+        key = username.lower()
+        if key in self.users:
+            return 400, {"error": "Username already exists"}, {}
+        self.users[key] = {"_id": secrets.token_hex(12), "username": key, "displayName": username,
+                           "roles": body.get("roles") if isinstance(body.get("roles"), list) else [],
+                           "createdAt": now_iso(), "lastLogin": now_iso(), "questionCount": 0,
+                           "consentAccepted": bool(body.get("consentAccepted")), "consentDate": body.get("consentDate")}
+        user = {"username": key, "displayName": username, "questionCount": 0}
+        return 201, {"success": True, "message": "User registered successfully", "user": user}, self.auth_cookie(key)
+
+    def login(self, req: Request) -> Response:
+        body = req.json()
+        username = str(body.get("username") or "")
+        if not username:
+            return 400, {"error": "Username is required"}, {}
+        user = self.users.get(username.lower())
+        if user is None:
+            return 401, {"error": "Username not found"}, {}
+        user["lastLogin"] = now_iso()
+        if isinstance(body.get("roles"), list):
+            user["roles"] = body["roles"]
+        out = {"username": user["username"], "displayName": user["displayName"], "questionCount": user["questionCount"]}
+        return 200, {"success": True, "message": "Login successful", "user": out}, self.auth_cookie(user["username"])
+
+    def auth_status(self, req: Request) -> Response:
+        username = self.tokens.get(req.cookies.get("authToken", ""))
+        if username is None:
+            return 401, {"error": "Authentication required - no token found"}, {}
+        user = self.users[username]
+        return 200, {"authenticated": True, "user": {"username": username, "displayName": user["displayName"],
+                                                     "questionCount": user["questionCount"]}}, {}
+
+    def question(self, req: Request) -> Response:
+        body = req.json()
+        username = self.tokens.get(req.cookies.get("authToken", "")) or str(body.get("username") or "").strip().lower()
+        if not username:
+            return 401, {"error": "Authentication required or username missing"}, {}
+        user = self.users.get(username)
+        if user is None:
+            return 401, {"error": "Username not found"}, {}
+        text = str(body.get("question") or "").strip()
+        if not text:
+            return 400, {"error": "Question is required"}, {}
+        self.questions.append({"userId": user["_id"], "username": username, "question": text, "timestamp": now_iso()})
+        user["questionCount"] += 1
+        return 200, {"success": True, "message": "Thank you! Submit another question.",
+                     "questionCount": user["questionCount"]}, {}
+
+    def save_history(self, req: Request) -> Response:
+        body = req.json()
+        username, messages = body.get("username"), body.get("messages")
+        if not username or not isinstance(messages, list):
+            return 400, {"error": "Invalid request format"}, {}
+        key = str(username).lower()
+        self.chat_history[key] = {"username": key, "messages": messages, "lastUpdated": now_iso()}
+        return 200, {"success": True}, {}
+
+    def admin_questions(self, _req: Request) -> Response:
+        grouped: Dict[str, dict] = {}
+        for q in reversed(self.questions):
+            entry = grouped.setdefault(q["username"], {
+                "roles": self.users.get(q["username"], {}).get("roles", []), "questions": []})
+            entry["questions"].append({"question": q["question"], "timestamp": q["timestamp"]})
+        return 200, {"totalQuestions": len(self.questions), "userCount": len(grouped), "questionsByUser": grouped}, {}
+
+    def export_history(self, req: Request) -> Response:
+        user = (req.query.get("user") or "").lower()
+        start, end = req.query.get("from"), req.query.get("to")
+        bounds = [parse_epoch_ms(v) if v else None for v in (start, end)]
+        if (start and bounds[0] is None) or (end and bounds[1] is None):
+            return 400, {"error": "Invalid 'from'/'to' date"}, {}
+        lines = []
+        for doc in self.chat_history.values():
+            updated = parse_epoch_ms(doc["lastUpdated"])
+            if (user and doc["username"] != user) or (bounds[0] is not None and updated < bounds[0]) or (bounds[1] is not None and updated > bounds[1]):
+                continue
+            lines.append(json.dumps(doc) + "\n")
+        return 200, RawBody("".join(lines).encode("utf-8"), "application/x-ndjson; charset=utf-8"), {}
+
+    def admin_stats(self, _req: Request) -> Response:
+        counts: Dict[str, int] = {}
+        for q in self.questions:
+            counts[q["username"]] = counts.get(q["username"], 0) + 1
+        top = sorted(counts.items(), key=lambda kv: -kv[1])[:10]
+        total_users = len(self.users)
+        return 200, {
+            "totalUsers": total_users,
+            "totalQuestions": len(self.questions),
+            "averageQuestionsPerUser": f"{len(self.questions) / total_users:.2f}" if total_users else 0,
+            "topContributors": [{"_id": u, "count": c} for u, c in top],
+        }, {}
+
+
+class StandinServer:
+    """HTTP/1.1 front end: keep-alive, throttling, fault injection and latency around StandinApi."""
+
+    def __init__(self, api: StandinApi, latency: Callable[[], float], route_latency: List[Tuple[str, Callable[[], float]]],
+                 error_rate: float, error_statuses: List[int], bucket: Optional[TokenBucket], verbose: bool):
+        self.api = api
+        self.latency = latency
+        self.route_latency = sorted(route_latency, key=lambda kv: -len(kv[0]))  # longest prefix wins
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.bucket = bucket
+        self.verbose = verbose
+        self.stats = {"requests": 0, "throttled": 0, "injected_errors": 0, "connections": 0, "by_status": {}}
+
+    def delay_for(self, path: str) -> float:
+        for prefix, sampler in self.route_latency:
+            if path.startswith(prefix):
+                return sampler()
+        return self.latency()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats["connections"] += 1
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self.write(writer, 431, {"error": "Request header fields too large"}, {}, close=True)
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self.write(writer, 400, {"error": "Bad request line"}, {}, close=True)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                conn_hdr = headers.get("connection", "").lower()
+                close = conn_hdr == "close" or (version == "HTTP/1.0" and conn_hdr != "keep-alive")
+                try:
+                    body = await self.read_body(reader, headers)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    return
+                except ValueError:
+                    # Bad Content-Length or chunk size: the rest of the stream can't be framed
+                    await self.write(writer, 400, {"error": "Bad request body framing"}, {}, close=True)
+                    return
+                except zlib.error as e:
+                    await self.write(writer, 400, {"error": f"Invalid Content-Encoding body: {e}"}, {}, close=close)
+                    if close:
+                        return
+                    continue
+                status, payload, extra = await self.respond(method.upper(), target, headers, body)
+                await self.write(writer, status, payload, extra, close=close)
+                if close:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def read_body(self, reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readuntil(b"\r\n")
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        else:
+            length = int(headers.get("content-length") or 0)
+            body = await reader.readexactly(length) if length else b""
+        encoding = headers.get("content-encoding", "").lower()
+        if body and encoding in ("gzip", "deflate"):
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS)
+        return body
+
+    async def respond(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Response:
+        self.stats["requests"] += 1
+        req = Request(method, target, headers, body)
+        if self.bucket is not None and req.path.startswith("/api/"):
+            wait = self.bucket.take()
+            if wait > 0:
+                self.stats["throttled"] += 1
+                return 429, {"error": "Too many requests"}, {"Retry-After": str(max(1, math.ceil(wait)))}
+        if req.path == "/__standin/stats":
+            return 200, dict(self.stats, uptime_s=round(time.time() - self.api.started, 1)), {}
+        delay = self.delay_for(req.path)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate > 0 and random.random() < self.error_rate:
+            self.stats["injected_errors"] += 1
+            status = random.choice(self.error_statuses)
+            return status, {"error": f"Injected {HTTPStatus(status).phrase}"}, {}
+        try:
+            return self.api.dispatch(req)
+        except (ValueError, msgpack_errors) as e:  # bad JSON / MessagePack / numbers in the request
+            return 400, {"error": str(e)}, {}
+
+    async def write(self, writer: asyncio.StreamWriter, status: int, payload, extra: Dict[str, str], close: bool) -> None:
+        by_status = self.stats["by_status"]
+        by_status[status] = by_status.get(status, 0) + 1
+        if isinstance(payload, RawBody):
+            data, content_type = payload.data, payload.content_type
+        else:
+            data = b"" if payload is None else json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        head = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+                f"Content-Length: {len(data)}",
+                f"Connection: {'close' if close else 'keep-alive'}"]
+        if data:
+            head.append(f"Content-Type: {content_type}")
+        head.extend(f"{k}: {v}" for k, v in extra.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+        await writer.drain()
+        if self.verbose:
+            print(f"[standin] {status} {len(data)}B")
+
+
+def load_devices(path: Optional[str]) -> List[dict]:
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("devices", []) if isinstance(data, dict) else data
+    # Same set dummy.py sends to
+    return [{"name": f"node_5.{i:02d}", "type": "standin", "floor": 5, "position": {"x": 0, "y": 0, "z": 0},
+             "pinned": False} for i in range(1, 35) if i != 22]
+
+
+async def serve(args) -> None:
+    api = StandinApi(load_devices(args.devices_file), args.auto_create, args.history_limit)
+    route_latency = []
+    for item in args.route_latency:
+        prefix, _, spec = item.partition("=")
+        route_latency.append((prefix, parse_latency(spec)))
+    bucket = TokenBucket(args.rate, args.burst or args.rate) if args.rate > 0 else None
+    statuses = [int(s) for s in args.error_statuses.split(",") if s.strip()]
+    server = StandinServer(api, parse_latency(args.latency), route_latency, args.error_rate, statuses, bucket, args.verbose)
+    srv = await asyncio.start_server(server.handle_connection, args.host, args.port, limit=MAX_HEADER_BYTES,
+                                     backlog=args.backlog)
+    print(f"[standin] Listening on http://{args.host}:{args.port} ({len(api.devices)} devices, latency={args.latency}, "
+          f"error_rate={args.error_rate}, rate={args.rate or 'unlimited'})")
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        print(f"[standin] {json.dumps(server.stats)}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="In-memory stand-in for the API with latency and fault injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--devices-file", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "devices.json"))
+    parser.add_argument("--auto-create", action="store_true", help="Create unknown devices on PUT instead of 404")
+    parser.add_argument("--history-limit", type=int, default=10000, help="Readings kept per device")
+    parser.add_argument("--latency", default="none", help="Default latency distribution (ms), e.g. lognormal:8,0.6")
+    parser.add_argument("--route-latency", action="append", default=[], metavar="PREFIX=SPEC",
+                        help="Latency for paths starting with PREFIX, e.g. /api/survey=uniform:20,80 (repeatable)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--error-statuses", default="500,502,503", help="Statuses used for injected errors")
+    parser.add_argument("--rate", type=float, default=0.0, help="Token bucket refill rate in requests/s (0 = off)")
+    parser.add_argument("--burst", type=float, default=0.0, help="Token bucket size (default: --rate)")
+    parser.add_argument("--backlog", type=int, default=1024)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    try:
+        parse_latency(args.latency)
+        for item in args.route_latency:
+            if "=" not in item:
+                raise ValueError(f"--route-latency '{item}' must be PREFIX=SPEC")
+            parse_latency(item.partition("=")[2])
+    except ValueError as e:
+        print(f"[standin] {e}", file=sys.stderr)
+        return 2
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,40 @@
+"""timeparse.py
+Shared time parsing for the Python tools (bulk_history_download.py, simulate_history.py,
+standin_server.py). Accepts the same forms as the API's `from`/`to` and reading timestamps:
+
+  1727740800000          epoch milliseconds (number or digit string)
+  2025-10-01             ISO date, midnight UTC
+  2025-10-01T08:30       ISO datetime, UTC when no offset is given
+  2025-10-01T08:30:00Z   ISO datetime with Z or an explicit offset
+
+Example:
+  from timeparse import parse_time
+  start = parse_time("2025-09-01")   # 1756684800000
+"""
+from __future__ import annotations
+import math
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def parse_epoch_ms(raw) -> Optional[int]:
+    """Epoch milliseconds from a number, digit string or ISO 8601 string; None if invalid."""
+    try:
+        if isinstance(raw, str) and not raw.isdigit():
+            dt = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            ms = dt.timestamp() * 1000
+        else:
+            ms = float(raw)
+    except (TypeError, ValueError):
+        return None
+    return int(ms) if math.isfinite(ms) and ms >= 0 else None
+
+
+def parse_time(raw: str) -> int:
+    """Like parse_epoch_ms, but raises ValueError for command-line input that is not a time."""
+    ms = parse_epoch_ms(raw)
+    if ms is None:
+        raise ValueError(f"Invalid time {raw!r} (expected epoch milliseconds or an ISO date/datetime)")
+    return ms
@@ -1,10 +1,10 @@
-import requests
-import json
 import sys
 import time
 
+from http_client import create_session
+
 API_BASE = "http://localhost:5000/api"
-SESSION = requests.Session()
+SESSION = create_session(API_BASE)
 
 def print_step(msg):
     print(f"\n[STEP] {msg}")
@@ -23,7 +23,7 @@ def main():
     
     # 1. Register User
     print_step(f"Registering user '{test_user}' with roles: {test_roles}")
-    res = SESSION.post(f"{API_BASE}/survey/register", json={
+    res = SESSION.post("survey/register", json={
         "username": test_user,
         "roles": test_roles,
         "consentAccepted": True,
@@ -37,7 +37,7 @@ def main():
 
     # 2. Login (to verify roles update and auth token)
     print_step("Logging in (simulating re-login to check roles persistence)")
-    res = SESSION.post(f"{API_BASE}/survey/login", json={
+    res = SESSION.post("survey/login", json={
         "username": test_user,
         "roles": test_roles # Frontend sends roles on login too
     })
@@ -54,7 +54,7 @@ def main():
 
     # 3. Submit Question
     print_step("Submitting a question")
-    res = SESSION.post(f"{API_BASE}/survey/question", json={
+    res = SESSION.post("survey/question", json={
         "question": test_question,
         "username": test_user # Provided as fallback, although cookie should work
     })
@@ -73,7 +73,7 @@ def main():
         {"sender": "user", "text": test_question, "timestamp": "10:00:05"}
     ]
     
-    res = SESSION.post(f"{API_BASE}/survey/history", json={
+    res = SESSION.post("survey/history", json={
         "username": test_user,
         "messages": test_history
     })
@@ -88,7 +88,7 @@ def main():
     
     # 5a. Check Questions
     print("   Fetching ./survey/admin/questions...")
-    res = SESSION.get(f"{API_BASE}/survey/admin/questions")
+    res = SESSION.get("survey/admin/questions")
     if res.status_code != 200:
         print_result(False, "Failed to fetch admin questions.")
     
@@ -121,7 +121,7 @@ def main():
 
     # 5b. Check History
     print("   Fetching ./survey/admin/history...")
-    res = SESSION.get(f"{API_BASE}/survey/admin/history")
+    res = SESSION.get("survey/admin/history")
     if res.status_code != 200:
         print_result(False, "Failed to fetch admin history.")
     
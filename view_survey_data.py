@@ -1,12 +1,16 @@
 import argparse
-import requests
 import json
 import csv
+import gzip
+import os
 import sys
 from datetime import datetime
 
+from http_client import create_session
+
 # Configuration
 API_BASE = "http://localhost:5000/api"
+SESSION = create_session(API_BASE)
 
 def print_header():
     print("=" * 40)
@@ -17,7 +21,7 @@ def print_header():
 def get_survey_stats():
     print("\033[93mFetching survey statistics...\033[0m") # Yellow
     try:
-        response = requests.get(f"{API_BASE}/survey/admin/stats")
+        response = SESSION.get("survey/admin/stats")
         response.raise_for_status()
         data = response.json()
         
@@ -37,7 +41,7 @@ def get_survey_stats():
 def get_all_questions():
     print("\033[93mFetching all questions...\033[0m")
     try:
-        response = requests.get(f"{API_BASE}/survey/admin/questions")
+        response = SESSION.get("survey/admin/questions")
         response.raise_for_status()
         data = response.json()
         
@@ -74,7 +78,7 @@ def get_all_questions():
 def get_questions_by_user():
     print("\033[93mFetching questions grouped by user...\033[0m")
     try:
-        response = requests.get(f"{API_BASE}/survey/admin/questions")
+        response = SESSION.get("survey/admin/questions")
         response.raise_for_status()
         data = response.json()
         print("")
@@ -91,7 +95,7 @@ def get_questions_by_user():
 def export_questions():
     print("\033[93mExporting questions to JSON file...\033[0m")
     try:
-        response = requests.get(f"{API_BASE}/survey/admin/questions")
+        response = SESSION.get("survey/admin/questions")
         response.raise_for_status()
         data = response.json()
         
@@ -135,7 +139,7 @@ def export_questions():
 def export_chat_history():
     print("\033[93mExporting chat history to JSON file...\033[0m")
     try:
-        response = requests.get(f"{API_BASE}/survey/admin/history")
+        response = SESSION.get("survey/admin/history")
         response.raise_for_status()
         data = response.json()
         
@@ -153,11 +157,38 @@ def export_chat_history():
     except Exception as e:
         print(f"\033[91mError exporting chat history: {e}\033[0m")
 
+def stream_chat_history(user=None, start=None, end=None):
+    """Stream the NDJSON history export into a gzip file without holding it in memory."""
+    print("\033[93mStreaming chat history to NDJSON (gzip)...\033[0m")
+    params = {k: v for k, v in (("user", user), ("from", start), ("to", end)) if v}
+    timestamp = datetime.now().strftime('%Y-%m-%d-%H%M%S')
+    filename = f"chat-history-{timestamp}.ndjson.gz"
+    try:
+        lines = 0
+        # Read timeout only: a long export may legitimately take longer than the session default
+        with SESSION.get("survey/admin/history/export", params=params, stream=True, timeout=(10, 120)) as response:
+            response.raise_for_status()
+            # Write to a .part file so an interrupted export never looks complete
+            with gzip.open(filename + ".part", 'wb') as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    f.write(chunk)
+                    lines += chunk.count(b"\n")
+        os.replace(filename + ".part", filename)
+
+        print(f"\033[92m✓ Chat history exported to: {filename}\033[0m")
+        print(f"  Users with history: {lines}")
+
+    except Exception as e:
+        print(f"\033[91mError streaming chat history: {e}\033[0m")
+
 def main():
     parser = argparse.ArgumentParser(description="View and Export Survey Data")
     parser.add_argument('action', nargs='?', default='summary', 
-                        choices=['summary', 'all', 'by-user', 'stats', 'export', 'history'],
+                        choices=['summary', 'all', 'by-user', 'stats', 'export', 'history', 'history-stream'],
                         help="Action to perform (default: summary)")
+    parser.add_argument('--user', help="history-stream: only this username")
+    parser.add_argument('--from', dest='start', help="history-stream: lastUpdated on/after (ISO date or epoch ms)")
+    parser.add_argument('--to', dest='end', help="history-stream: lastUpdated on/before (ISO date or epoch ms)")
     
     # Detect if running in a Jupyter notebook/IPython to prevent argparse from reading kernel flags
     if 'ipykernel' in sys.modules:
@@ -177,6 +208,8 @@ def main():
         export_questions()
     elif args.action == 'history':
         export_chat_history()
+    elif args.action == 'history-stream':
+        stream_chat_history(args.user, args.start, args.end)
         
     print("")
     print("\033[93mAvailable actions:\033[0m")
@@ -186,6 +219,7 @@ def main():
     print("  python view_survey_data.py stats     # Show statistics")
     print("  python view_survey_data.py export    # Export to JSON/CSV")
     print("  python view_survey_data.py history   # Export chat history to JSON")
+    print("  python view_survey_data.py history-stream [--user U] [--from D] [--to D]  # Stream to .ndjson.gz")
 
 if __name__ == "__main__":
     main()